@@ -1,6 +1,5 @@
 import logging
 import threading
-import time
 import json
 import queue
 import tkinter as tk
@@ -52,7 +51,7 @@ class CancelableRunner(Runner):
             prompt = None
             counter = 1
             while not self.stop_requested and getattr(self.agent, 'task', False):
-                time.sleep(1)
+                self.agent.env.settle_pending()
                 logger.info(f"Response {counter}:")
                 response = self.agent.chat()
                 logger.info(response)
@@ -1,7 +1,7 @@
-from openai import OpenAI
 from history import History
 import json
 from load_env import xAI
+from client import get_openai_client
 
 history = History()
 tools_definition2 = [
@@ -32,10 +32,7 @@ def add_new_data(data):
 tools_map2 = {
     "add_new_data": add_new_data
 }
-client = OpenAI(
-    api_key=xAI,
-    base_url="https://api.x.ai/v1"
-)
+client = get_openai_client("https://api.x.ai/v1", xAI)
 
 
 def request_agent(text: str):
@@ -10,10 +10,11 @@ import time
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from client import Client
+from client import Client, get_openai_client
 from environment.Android import Android
-from config import APIConfig, ModelConfig, DataConfig
-from openai import OpenAI
+from environment.element_format import COMPACT_FORMAT_HELP, measure_tokens
+from environment.imaging import PIL_AVAILABLE, ImagePipeline
+from config import APIConfig, ModelConfig, DataConfig, AgentConfig
 
 
 def image_bytes_to_data_url(image_bytes, mime_type="image/png"):
@@ -73,7 +74,9 @@ After completing actions:
 
 ## Important Guidelines
 
-1. **Element Freshness**: The element list becomes stale after ANY tap, scroll, or navigation. Always call `get_screen_elements` again after such actions.
+1. **Element Freshness**: The element list becomes stale after ANY tap, scroll, or navigation. Always call `get_screen_elements` again after such actions. If it reports `unchanged: true`, the screen did not change and the previous element list is still valid.
+   After small actions (toggling a switch, typing, dismissing a toast) call `get_screen_elements(since_last=true)` to get only the added, changed and removed elements; indexes of the other elements stay the same. Request the full list again (since_last=false) whenever you are unsure of the screen.
+   Use `query_elements` with a selector (e.g. `Button[text~="sign in"]`, `RecyclerView TextView:nth-child(1)`) to pick out specific elements without re-reading the whole list; pass `refresh=true` after an action.
 
 2. **Scroll Strategy**: 
    - Use `scroll(direction="down")` to reveal content below
@@ -91,7 +94,8 @@ After completing actions:
    - Never repeat the exact same failed action
 
 5. **App Navigation**:
-   - Use `open_app` with common names ("Chrome", "YouTube") or package names
+   - Use `open_app` with app names ("Chrome", "YouTube", "Spotify") or package names
+   - Use `find_app` if you are unsure which installed app matches a name
    - Use `press_key("back")` to go back one screen
    - Use `press_key("home")` to return to home screen
 
@@ -118,21 +122,32 @@ class ActionAgent:
         infinite: bool = False,
         filters=None, 
         interactive: bool = False, 
-        audio: bool = False
+        audio: bool = False,
+        env: Android = None,
+        element_format: str = None
     ):
+        self.element_format = (element_format or AgentConfig.ELEMENT_FORMAT).lower()
+        system_prompt = SYSTEM_PROMPT
+        if self.element_format == "compact":
+            system_prompt += "\n\n## Element Format\n" + COMPACT_FORMAT_HELP
         self.messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": system_prompt},
             {"role": "assistant", "content": "I'm ready to help you with your Android device. What would you like me to do?"},
             {"role": "user", "content": message}
         ]
         
-        self.env = Android()
+        self.env = env or Android()
         self.filters = filters
+        self.image_pipeline = ImagePipeline()
+        self._listed_snapshot = None  # Snapshot whose full element list was last sent to the model
+        # Running totals of element-list tokens in both formats (with AgentConfig.MEASURE_ELEMENT_TOKENS)
+        self.element_tokens = {"steps": 0, "json_tokens": 0, "compact_tokens": 0}
         
         # Build tools map with new function names
         self.tools_map = {
             # Screen analysis
             "get_screen_elements": self._get_screen_elements,
+            "query_elements": self._query_elements,
             "analyze_screen": self._analyze_screen,
             "get_device_info": self.env.get_device_info,
             
@@ -153,6 +168,7 @@ class ActionAgent:
             "press_key": self.env.press_key,
             "open_app": self.env.open_app,
             "get_installed_apps": self.env.get_installed_apps,
+            "find_app": self.env.find_app,
             
             # Utility
             "wait": self.env.wait,
@@ -235,9 +251,38 @@ class ActionAgent:
                 }
             })
 
-    def _get_screen_elements(self, include_all: bool = False):
+    def _get_screen_elements(self, include_all: bool = False, since_last: bool = False):
         """Get screen elements with optional filtering."""
-        return self.env.get_screen_elements(filters=self.filters, include_all=include_all)
+        # A diff only makes sense against a list the model has actually seen
+        since_last = since_last and self._listed_snapshot is not None and self._listed_snapshot == self.env._snapshot_key
+        result = self.env.get_screen_elements(filters=self.filters, include_all=include_all,
+                                              element_format=self.element_format, since_last=since_last)
+        if result.get("mode") == "since_last":
+            self._listed_snapshot = self.env._snapshot_key
+        elif result.get("unchanged") and self._listed_snapshot == self.env._snapshot_key:
+            # The previous list is already in the conversation, don't send it again
+            result.pop("elements", None)
+            result["message"] = "Screen unchanged since the last observation; the previous element list and indexes are still valid."
+        elif result.get("status") == "success":
+            self._listed_snapshot = self.env._snapshot_key
+            if AgentConfig.MEASURE_ELEMENT_TOKENS:
+                self._record_element_tokens(result)
+        return result
+
+    def _record_element_tokens(self, result: dict):
+        """Measure what this element list costs in each format and add it to the running totals."""
+        stats = measure_tokens(result, self.env.elements)
+        self.element_tokens["steps"] += 1
+        self.element_tokens["json_tokens"] += stats["json_tokens"]
+        self.element_tokens["compact_tokens"] += stats["compact_tokens"]
+
+    def _query_elements(self, selector: str, limit: int = 20, refresh: bool = False):
+        """Query the cached element snapshot with a selector, optionally re-reading the screen first."""
+        if refresh:
+            snapshot = self.env.get_screen_elements(filters=self.filters)
+            if snapshot.get("status") != "success":
+                return snapshot
+        return self.env.query_elements(selector, limit=limit, filters=self.filters, element_format=self.element_format)
     
     def _analyze_screen(self, question: str, focus_area: str = "full_screen"):
         """
@@ -248,7 +293,13 @@ class ActionAgent:
             focus_area: Area to focus on (full_screen, top, bottom, center, left, right)
         """
         try:
-            screenshot_bytes = self.env.screenshot()
+            if PIL_AVAILABLE:
+                encoded = self.image_pipeline.process(self.env.screenshot_image())
+                image_url = encoded.data_url()
+                print(f"[ActionAgent] Screenshot {encoded.width}x{encoded.height} {encoded.image_format}: "
+                      f"{len(encoded.data) / 1024:.0f} KB in {encoded.encode_ms:.0f} ms")
+            else:
+                image_url = image_bytes_to_data_url(self.env.screenshot())
             
             # Build the analysis prompt
             area_context = ""
@@ -266,10 +317,7 @@ Provide a clear, concise answer based on what you can see in the screenshot. Inc
 
 Be specific about positions (top, bottom, center) and element types (button, text field, icon) when relevant."""
 
-            completion = OpenAI(
-                base_url=APIConfig.get_base_url(),
-                api_key=APIConfig.get_api_key()
-            ).chat.completions.create(
+            completion = get_openai_client().chat.completions.create(
                 model=ModelConfig.get_vision_model(),
                 messages=[
                     {
@@ -278,7 +326,7 @@ Be specific about positions (top, bottom, center) and element types (button, tex
                             {"type": "text", "text": analysis_prompt},
                             {
                                 "type": "image_url",
-                                "image_url": {"url": image_bytes_to_data_url(screenshot_bytes)}
+                                "image_url": {"url": image_url}
                             }
                         ]
                     }
@@ -1,6 +1,7 @@
 """
-Vision Agent for Amadeus - Pure vision-based UI automation without UI tree parsing.
-Relies entirely on visual understanding and coordinate-based interactions.
+Vision Agent for Amadeus - Vision-based UI automation.
+Relies on visual understanding and coordinate-based interactions; the UI tree is
+only consulted as a fast path for locating literal text.
 
 Uses a grid overlay system for accurate coordinate detection:
 - Screenshots are annotated with a labeled grid
@@ -11,18 +12,21 @@ Uses a grid overlay system for accurate coordinate detection:
 import os
 import sys
 import base64
+import functools
 import json
 import time
 import re
-import requests
+import httpx
 from io import BytesIO
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from client import Client
+from client import Client, get_http_client
 from environment.Android import Android
-from config import APIConfig, ModelConfig, DataConfig
+from environment.imaging import ImagePipeline, NUMPY_AVAILABLE, perceptual_hash, frame_thumbnail, frame_change
+from agent.vision_cache import VisionCache
+from config import APIConfig, ModelConfig, DataConfig, AgentConfig, VisionCacheConfig, VisionLocatorConfig
 from openai import OpenAI
 
 # ============================================================================
@@ -65,6 +69,146 @@ GRID_ROWS = 40   # 1-40 rows (was 20)
 GRID_COLOR = (255, 0, 0, 180)  # Semi-transparent red
 LABEL_COLOR = (255, 255, 0)  # Yellow labels
 LABEL_FREQUENCY = 2  # Only label every Nth cell to reduce clutter
+LABEL_ALL_MAX_CELLS = 144  # Grids up to this many cells (coarse/zoomed ones) label every cell
+
+# _call_vision_model answers starting with these are failures, not analyses
+VISION_ERROR_PREFIXES = ("NVIDIA Vision API error", "Vision response parsing error")
+
+# Structured fields of FOUND/cell/confidence answers, one per line
+ANSWER_FIELD_RES = {
+    "found": re.compile(r'^\W*FOUND:\s*(yes|no)\b', re.IGNORECASE | re.MULTILINE),
+    "cell": re.compile(r'^\W*cell:\W*([A-Za-z])(\d{1,2})\b', re.IGNORECASE | re.MULTILINE),
+    "confidence": re.compile(r'^\W*confidence:\W*(high|medium|low)\b', re.IGNORECASE | re.MULTILINE),
+}
+
+# The same fields within one line of a batch answer: "2. FOUND: yes | cell: C5 | confidence: high"
+BATCH_LINE_RE = re.compile(r'^\W*(\d+)\s*[.):-]\s*(.*)$', re.MULTILINE)
+BATCH_FIELD_RES = {
+    "found": re.compile(r'\bFOUND:\s*(yes|no)\b', re.IGNORECASE),
+    "cell": re.compile(r'\bcell:\W*([A-Za-z])(\d{1,2})\b', re.IGNORECASE),
+    "confidence": re.compile(r'\bconfidence:\W*(high|medium|low)\b', re.IGNORECASE),
+}
+
+
+def answer_text(response: str) -> str:
+    """The part of a response after any <think>...</think> reasoning (empty while still thinking)."""
+    if "<think>" in response:
+        _, _, after = response.partition("</think>")
+        return after
+    return response
+
+
+def parse_answer_fields(response: str, complete: bool = False) -> dict:
+    """
+    FOUND/cell/confidence fields of a (possibly partial) locate answer.
+
+    Unless the answer is complete, only finished lines count, so a streamed
+    "cell: B1" isn't read before its second digit arrives. Reasoning in a
+    <think> block is ignored.
+
+    Args:
+        response: Answer text so far
+        complete: The answer has ended, so its last line counts even without a newline
+    """
+    text = answer_text(response)
+    if not complete:
+        text = text[:text.rfind("\n") + 1]
+    return _read_fields(text, ANSWER_FIELD_RES)
+
+
+def parse_batch_answer(response: str, complete: bool = False) -> dict:
+    """
+    {element number: fields} of a (possibly partial) batch locate answer.
+
+    Args:
+        response: Answer text so far
+        complete: The answer has ended, so its last line counts even without a newline
+    """
+    text = answer_text(response)
+    if not complete:
+        text = text[:text.rfind("\n") + 1]
+    answers = {}
+    for match in BATCH_LINE_RE.finditer(text):
+        answers.setdefault(int(match.group(1)), _read_fields(match.group(2), BATCH_FIELD_RES))
+    return answers
+
+
+def _read_fields(text: str, patterns: dict) -> dict:
+    fields = {}
+    found = patterns["found"].search(text)
+    if found:
+        fields["found"] = found.group(1).lower() == "yes"
+    cell = patterns["cell"].search(text)
+    if cell:
+        fields["cell"] = cell.group(1).upper() + str(int(cell.group(2)))
+    confidence = patterns["confidence"].search(text)
+    if confidence:
+        fields["confidence"] = confidence.group(1).lower()
+    return fields
+
+
+def locate_answer_complete(response: str) -> bool:
+    """
+    Stop condition for streamed locate answers: an element was found and its cell and confidence are in.
+
+    The confidence usually ends the answer, so it is also read from the unfinished
+    last line (its values are whole words); the cell still needs a finished line.
+    """
+    fields = parse_answer_fields(response)
+    if "confidence" not in fields:
+        fields["confidence"] = parse_answer_fields(response, complete=True).get("confidence")
+    return fields.get("found") is True and "cell" in fields and fields["confidence"] is not None
+
+
+# Tools that may change the screen; running one invalidates cached vision answers
+SCREEN_ACTIONS = (
+    "tap_cell", "tap_at", "tap_element", "tap_text", "double_tap_at", "long_press_at",
+    "type_text", "scroll", "swipe", "press_key", "open_app", "wait",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _grid_font(size: int = 10):
+    """Small font for grid labels, loaded once."""
+    for path in ("/System/Library/Fonts/Helvetica.ttc", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=8)
+def _grid_layer(width: int, height: int, cols: int, rows: int, label_alpha: int,
+                label_every: int = LABEL_FREQUENCY) -> 'Image.Image':
+    """
+    Transparent RGBA layer with the grid lines and cell labels, rendered once per geometry.
+    
+    Callers paste it onto screenshots with the layer as its own mask; it must not be modified.
+    """
+    layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    font = _grid_font()
+    cell_width = width / cols
+    cell_height = height / rows
+    
+    # Grid lines, thicker every 5 cells
+    for col in range(cols + 1):
+        x = int(col * cell_width)
+        draw.line([(x, 0), (x, height)], fill=(255, 0, 0, 255), width=2 if col % 5 == 0 else 1)
+    for row in range(rows + 1):
+        y = int(row * cell_height)
+        draw.line([(0, y), (width, y)], fill=(255, 0, 0, 255), width=2 if row % 5 == 0 else 1)
+    
+    # Labels on every label_every-th cell, on a dark background for visibility
+    for col in range(0, cols, label_every):
+        for row in range(0, rows, label_every):
+            label = f"{chr(ord('A') + col)}{row + 1}"
+            x = int(col * cell_width + 2)
+            y = int(row * cell_height + 2)
+            draw.rectangle(draw.textbbox((x, y), label, font=font), fill=(0, 0, 0, label_alpha))
+            draw.text((x, y), label, fill=LABEL_COLOR + (255,), font=font)
+    return layer
 
 
 class GridOverlay:
@@ -76,65 +220,61 @@ class GridOverlay:
     
     Cell labels use spreadsheet notation: A1, B2, ... T40
     For columns beyond J: K, L, M, N, O, P, Q, R, S, T
+    
+    A grid can also cover just a region of the screen (see subgrid()); it is
+    then drawn over a crop of that region, and its cells still convert to
+    device coordinates.
     """
     
-    def __init__(self, screen_width: int, screen_height: int, cols: int = GRID_COLS, rows: int = GRID_ROWS):
+    def __init__(self, screen_width: int, screen_height: int, cols: int = GRID_COLS, rows: int = GRID_ROWS,
+                 region: tuple = None):
+        """
+        Args:
+            screen_width: Screen width in pixels
+            screen_height: Screen height in pixels
+            cols: Number of columns (at most 26)
+            rows: Number of rows
+            region: (left, top, right, bottom) in device pixels the grid covers (default: whole screen)
+        """
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.cols = cols
         self.rows = rows
-        self.cell_width = screen_width / cols
-        self.cell_height = screen_height / rows
+        self.region = region or (0, 0, screen_width, screen_height)
+        self.cell_width = (self.region[2] - self.region[0]) / cols
+        self.cell_height = (self.region[3] - self.region[1]) / rows
+    
+    def subgrid(self, region: tuple, cols: int, rows: int) -> 'GridOverlay':
+        """Grid of cols x rows cells over a region of the screen (device pixels)."""
+        return GridOverlay(self.screen_width, self.screen_height, cols, rows, region=region)
+    
+    def cell_bounds(self, cell: str) -> tuple:
+        """(left, top, right, bottom) device pixels of a cell, or None if invalid."""
+        center = self.cell_to_coordinates(cell)
+        if center is None:
+            return None
+        col = int((center[0] - self.region[0]) / self.cell_width)
+        row = int((center[1] - self.region[1]) / self.cell_height)
+        left = self.region[0] + col * self.cell_width
+        top = self.region[1] + row * self.cell_height
+        return (int(left), int(top), int(left + self.cell_width), int(top + self.cell_height))
     
     def add_grid_to_image(self, image_bytes: bytes) -> bytes:
         """Add grid overlay to screenshot image."""
         if not PIL_AVAILABLE:
             return image_bytes
         
-        # Open image
-        img = Image.open(BytesIO(image_bytes))
-        draw = ImageDraw.Draw(img, 'RGBA')
-        
-        # Try to load a small font for dense grid
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 10)
-        except:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
-            except:
-                font = ImageFont.load_default()
-        
-        # Draw grid lines (thinner for dense grid)
-        for col in range(self.cols + 1):
-            x = int(col * self.cell_width)
-            # Major lines every 5 cells
-            width = 2 if col % 5 == 0 else 1
-            alpha = 200 if col % 5 == 0 else 100
-            draw.line([(x, 0), (x, self.screen_height)], fill=(255, 0, 0, alpha)[:3], width=width)
-        
-        for row in range(self.rows + 1):
-            y = int(row * self.cell_height)
-            width = 2 if row % 5 == 0 else 1
-            alpha = 200 if row % 5 == 0 else 100
-            draw.line([(0, y), (self.screen_width, y)], fill=(255, 0, 0, alpha)[:3], width=width)
-        
-        # Add cell labels - only at intersections of major grid lines to reduce clutter
-        for col in range(0, self.cols, LABEL_FREQUENCY):
-            for row in range(0, self.rows, LABEL_FREQUENCY):
-                label = self._cell_label(col, row)
-                x = int(col * self.cell_width + 2)
-                y = int(row * self.cell_height + 2)
-                
-                # Draw label background for visibility
-                bbox = draw.textbbox((x, y), label, font=font)
-                draw.rectangle(bbox, fill=(0, 0, 0, 180))
-                draw.text((x, y), label, fill=LABEL_COLOR, font=font)
+        img = self.add_grid_to_pil(Image.open(BytesIO(image_bytes)))
         
         # Convert back to bytes
         output = BytesIO()
         img.save(output, format='PNG')
         return output.getvalue()
     
+    def add_grid_to_pil(self, img: 'Image.Image') -> 'Image.Image':
+        """Add grid overlay to a screenshot that is already a PIL Image (no decode/encode)."""
+        return self._composite(img, label_alpha=180)
+    
     def draw_grid(self, img: 'Image.Image') -> 'Image.Image':
         """
         Add grid overlay to a PIL Image object.
@@ -142,39 +282,19 @@ class GridOverlay:
         """
         if not PIL_AVAILABLE:
             return img
-        
-        draw = ImageDraw.Draw(img, 'RGBA')
-        
-        # Try to load a small font for dense grid
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 10)
-        except:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
-            except:
-                font = ImageFont.load_default()
-        
-        # Draw grid lines
-        for col in range(self.cols + 1):
-            x = int(col * self.cell_width)
-            width = 2 if col % 5 == 0 else 1
-            draw.line([(x, 0), (x, self.screen_height)], fill=(255, 0, 0), width=width)
-        
-        for row in range(self.rows + 1):
-            y = int(row * self.cell_height)
-            width = 2 if row % 5 == 0 else 1
-            draw.line([(0, y), (self.screen_width, y)], fill=(255, 0, 0), width=width)
-        
-        # Add cell labels
-        for col in range(0, self.cols, LABEL_FREQUENCY):
-            for row in range(0, self.rows, LABEL_FREQUENCY):
-                label = self._cell_label(col, row)
-                x = int(col * self.cell_width + 2)
-                y = int(row * self.cell_height + 2)
-                bbox = draw.textbbox((x, y), label, font=font)
-                draw.rectangle(bbox, fill=(0, 0, 0))
-                draw.text((x, y), label, fill=LABEL_COLOR, font=font)
-        
+        return self._composite(img, label_alpha=255)
+    
+    def _composite(self, img: 'Image.Image', label_alpha: int) -> 'Image.Image':
+        """Blend the cached grid layer onto the image in place (converted to RGB first if needed)."""
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        # Sized to the image, so a downscaled screenshot gets a grid drawn at its own resolution
+        label_every = 1 if self.cols * self.rows <= LABEL_ALL_MAX_CELLS else LABEL_FREQUENCY
+        layer = _grid_layer(img.width, img.height, self.cols, self.rows, label_alpha, label_every)
+        if img.mode == "RGBA" and img.size == layer.size:
+            img.alpha_composite(layer)  # Keeps the screenshot opaque, unlike a masked paste
+        else:
+            img.paste(layer, (0, 0), layer)
         return img
     
     def _cell_label(self, col: int, row: int) -> str:
@@ -190,8 +310,8 @@ class GridOverlay:
         """
         cell = cell.strip().upper()
         
-        # Parse cell reference - handle single letter columns A-T
-        match = re.match(r'^([A-T])(\d+)$', cell)
+        # Parse cell reference - single letter columns (A-T on the default grid)
+        match = re.match(r'^([A-Z])(\d+)$', cell)
         if not match:
             return None
         
@@ -204,15 +324,15 @@ class GridOverlay:
             return None
         
         # Calculate center of cell
-        x = int((col + 0.5) * self.cell_width)
-        y = int((row + 0.5) * self.cell_height)
+        x = int(self.region[0] + (col + 0.5) * self.cell_width)
+        y = int(self.region[1] + (row + 0.5) * self.cell_height)
         
         return (x, y)
     
     def coordinates_to_cell(self, x: int, y: int) -> str:
         """Convert pixel coordinates to cell reference."""
-        col = int(x / self.cell_width)
-        row = int(y / self.cell_height)
+        col = int((x - self.region[0]) / self.cell_width)
+        row = int((y - self.region[1]) / self.cell_height)
         col = max(0, min(col, self.cols - 1))
         row = max(0, min(row, self.rows - 1))
         return self._cell_label(col, row)
@@ -274,20 +394,26 @@ Use `tap_cell("B2")` to tap precisely at that grid position.
 
 ### 4. Verify After Acting
 Call `observe_screen` again after taps to confirm success.
+If it reports `"unchanged": true`, the action had no visible effect - try a different cell or approach.
 
 ## Tips
 - If an element spans multiple cells, use the CENTER cell
 - Small icons: use the exact cell they're in
 - Buttons with text: reference the cell containing the text
 - If unsure, describe the element and let tap_element find it
+- Need several elements of one screen (e.g. a login form)? Locate them all with one `find_elements_batch` call
 
 Remember: The grid overlay ensures PRECISE coordinate mapping between what you see and where you tap!"""
 
 
 class VisionAgent:
     """
-    Pure vision-based agent for Android automation.
-    Does not use UI element trees - relies entirely on visual understanding.
+    Vision-based agent for Android automation.
+    Screens are understood through the vision model, with the UI element tree
+    as a shortcut where it is cheaper and exact:
+    - find_text/tap_text look the text up in the tree before asking the model
+      (VisionLocatorConfig.TEXT_FROM_TREE)
+    - taps are snapped onto the element under them (VisionLocatorConfig.SNAP_TAPS)
     
     Uses a grid overlay system for accurate coordinate mapping:
     1. Screenshots are annotated with a labeled grid (A1, B2, C3, etc.)
@@ -301,14 +427,21 @@ class VisionAgent:
         on_new_message: callable = None,
         infinite: bool = False,
         interactive: bool = False,
-        audio: bool = False
+        audio: bool = False,
+        env: Android = None,
+        vision_cache: bool = None
     ):
-        self.env = Android()
+        self.env = env or Android()
         self.screen_width = self.env.screen_width
         self.screen_height = self.env.screen_height
         
         # Initialize grid overlay system
         self.grid = GridOverlay(self.screen_width, self.screen_height)
+        self.image_pipeline = ImagePipeline()
+        self.last_image = None  # EncodedImage most recently sent to the vision model
+        use_cache = VisionCacheConfig.ENABLED if vision_cache is None else vision_cache
+        self.vision_cache = VisionCache() if use_cache and PIL_AVAILABLE else None
+        self._last_observation = None  # (frame thumbnail, focus, result) of the last observe_screen analysis
         
         # Build system prompt with grid info
         system_prompt = VISION_SYSTEM_PROMPT + "\n\n" + self.grid.get_grid_description()
@@ -324,6 +457,7 @@ class VisionAgent:
             # Observation
             "observe_screen": self._observe_screen,
             "find_element": self._find_element,
+            "find_elements_batch": self._find_elements_batch,
             "find_text": self._find_text,
             "get_screen_size": self._get_screen_size,
             
@@ -355,6 +489,8 @@ class VisionAgent:
             # Utility
             "wait": self.env.wait,
         }
+        for name in SCREEN_ACTIONS:
+            self.tools_map[name] = self._invalidating(self.tools_map[name])
         
         self.tool_definition = load_vision_tools()
         
@@ -430,25 +566,76 @@ class VisionAgent:
                 }
             })
     
-    def _call_vision_model(self, prompt: str, screenshot_bytes: bytes = None, add_grid: bool = True, think: bool = True) -> str:
+    def _invalidating(self, action: callable) -> callable:
+        """Wrap a screen action so it clears the vision cache once it has run."""
+        @functools.wraps(action)
+        def wrapper(*args, **kwargs):
+            try:
+                return action(*args, **kwargs)
+            finally:
+                if self.vision_cache is not None:
+                    self.vision_cache.invalidate()
+        return wrapper
+    
+    def _call_vision_model(self, prompt: str, screenshot_bytes: bytes = None, add_grid: bool = True, think: bool = True,
+                           image: 'Image.Image' = None, stop_when: callable = None, grid: GridOverlay = None,
+                           max_edge: int = None) -> str:
         """
         Call NVIDIA Nemotron vision model for image understanding.
         
+        Answers are cached per (frame perceptual hash, prompt, model, options)
+        until the next screen action, so asking again about an unchanged frame
+        returns immediately.
+        
+        With stop_when (and AgentConfig.STREAM_VISION), the answer is streamed
+        and the stream is closed as soon as stop_when(text so far) is true, so
+        callers that only need a few structured fields don't wait for the rest
+        of the completion.
+        
         Args:
             prompt: Question or instruction about the image
             screenshot_bytes: Raw screenshot bytes (will capture if None)
             add_grid: Whether to add grid overlay
             think: Whether to enable /think mode for deeper reasoning
+            image: Screenshot already captured as a PIL Image (takes precedence over screenshot_bytes)
+            stop_when: Optional callable(text) -> bool ending a streamed answer early
+            grid: Grid to overlay (default: the full-screen grid); a region grid
+                sends only the crop of its region
+            max_edge: Longest image edge (default: the pipeline's)
         """
-        if screenshot_bytes is None:
-            screenshot_bytes = self.env.screenshot()
-        
-        # Add grid overlay if requested
-        if add_grid and PIL_AVAILABLE:
-            screenshot_bytes = self.grid.add_grid_to_image(screenshot_bytes)
-        
-        # Encode image to base64
-        base64_image = base64.b64encode(screenshot_bytes).decode('utf-8')
+        grid = grid or self.grid
+        region = None if grid.region == self.grid.region else grid.region
+        cache_key = None
+        if PIL_AVAILABLE:
+            # Downscale, overlay the grid at the final size and encode exactly once
+            img = image
+            if img is None:
+                img = self.env.screenshot_image() if screenshot_bytes is None else Image.open(BytesIO(screenshot_bytes))
+            if self.vision_cache is not None:
+                cache_key = self.vision_cache.key(
+                    perceptual_hash(img, VisionCacheConfig.HASH_SIZE), prompt, NVIDIA_VISION_MODEL, add_grid, think,
+                    grid.region, grid.cols, grid.rows, max_edge
+                )
+                cached = self.vision_cache.get(cache_key)
+                if cached is not None:
+                    print("[VisionAgent] Vision cache hit (unchanged frame)")
+                    answer, self.last_image = cached
+                    return answer
+            encoded = self.image_pipeline.process(
+                img,
+                overlay=grid.add_grid_to_pil if add_grid else None,
+                device_size=(self.screen_width, self.screen_height),
+                region=region,
+                max_edge=max_edge
+            )
+            self.last_image = encoded
+            image_url = encoded.data_url()
+            print(f"[VisionAgent] Screenshot {encoded.width}x{encoded.height} {encoded.image_format}: "
+                  f"{len(encoded.data) / 1024:.0f} KB in {encoded.encode_ms:.0f} ms")
+        else:
+            if screenshot_bytes is None:
+                screenshot_bytes = self.env.screenshot()
+            image_url = image_bytes_to_data_url(screenshot_bytes)
         
         # Build content with image
         content = [
@@ -456,7 +643,7 @@ class VisionAgent:
             {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/png;base64,{base64_image}"
+                    "url": image_url
                 }
             }
         ]
@@ -477,18 +664,57 @@ class VisionAgent:
             "max_tokens": 4096,
             "temperature": 0.7,
             "top_p": 0.9,
-            "stream": False
+            "stream": stop_when is not None and AgentConfig.STREAM_VISION
         }
         
         try:
-            response = requests.post(NVIDIA_VISION_URL, headers=headers, json=payload, timeout=60)
-            response.raise_for_status()
-            result = response.json()
-            return result['choices'][0]['message']['content']
-        except requests.exceptions.RequestException as e:
+            http = get_http_client(NVIDIA_VISION_URL, headers["Authorization"])
+            if payload["stream"]:
+                answer = self._stream_vision_answer(http, headers, payload, stop_when)
+            else:
+                response = http.post(NVIDIA_VISION_URL, headers=headers, json=payload, timeout=60)
+                response.raise_for_status()
+                result = response.json()
+                answer = result['choices'][0]['message']['content']
+        except httpx.HTTPError as e:
             return f"NVIDIA Vision API error: {str(e)}"
-        except (KeyError, IndexError) as e:
+        except (KeyError, IndexError, ValueError) as e:
             return f"Vision response parsing error: {str(e)}"
+        
+        if cache_key is not None:
+            self.vision_cache.put(cache_key, answer, self.last_image)
+        return answer
+    
+    def _stream_vision_answer(self, http: httpx.Client, headers: dict, payload: dict, stop_when: callable) -> str:
+        """
+        Read a streamed (SSE) completion until it ends or stop_when(text so far) is true.
+        
+        Leaving the stream early closes the response, which stops the download
+        (the server may keep generating, but we no longer wait for it).
+        """
+        start = time.perf_counter()
+        answer = ""
+        with http.stream("POST", NVIDIA_VISION_URL, headers=dict(headers, Accept="text/event-stream"),
+                         json=payload, timeout=60) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                piece = (choices[0].get("delta") or {}).get("content") or ""
+                answer += piece
+                if piece and stop_when(answer):
+                    print(f"[VisionAgent] Answer complete after {(time.perf_counter() - start):.1f}s, closing stream")
+                    break
+        return answer
+    
+    @staticmethod
+    def _snap_taps():
+        """tap_coordinates snap argument for VisionLocatorConfig.SNAP_TAPS."""
+        return {"refresh": True, "off": False}.get(VisionLocatorConfig.SNAP_TAPS)
     
     def _tap_cell(self, cell: str) -> dict:
         """
@@ -506,7 +732,7 @@ class VisionAgent:
             }
         
         x, y = coords
-        result = self.env.tap_coordinates(x, y)
+        result = self.env.tap_coordinates(x, y, snap=self._snap_taps())
         
         return {
             "status": "success",
@@ -520,7 +746,26 @@ class VisionAgent:
         """
         Take a screenshot with grid overlay and provide detailed visual analysis.
         The grid helps identify precise element locations.
+        
+        When the screen hasn't changed since the last analysis with the same
+        focus (compared on a downsampled thumbnail), that analysis is returned
+        with "unchanged": True instead of calling the vision model again.
         """
+        img = self.env.screenshot_image() if PIL_AVAILABLE else None
+        thumbnail = frame_thumbnail(img) if img is not None and NUMPY_AVAILABLE else None
+        change = None
+        if thumbnail is not None and self._last_observation is not None:
+            previous_thumbnail, previous_focus, previous_result = self._last_observation
+            if previous_focus == focus:
+                change = frame_change(previous_thumbnail, thumbnail, ignore_top=VisionCacheConfig.STATUS_BAR_FRACTION)
+                if change["changed_fraction"] <= VisionCacheConfig.UNCHANGED_THRESHOLD:
+                    print("[VisionAgent] Screen unchanged, reusing the last observation")
+                    return dict(
+                        previous_result,
+                        unchanged=True,
+                        message="Screen unchanged since the last observation (the last action had no visible effect)"
+                    )
+        
         focus_instruction = ""
         if focus:
             focus_instruction = f"\n\nFocus especially on: {focus}"
@@ -548,41 +793,54 @@ Describe what you see:
 
 IMPORTANT: Always reference grid cells (A1, B2, etc.) for element positions!"""
 
-        analysis = self._call_vision_model(prompt, add_grid=True)
+        analysis = self._call_vision_model(prompt, add_grid=True, image=img)
         
-        return {
+        result = {
             "status": "success",
             "screen_size": {"width": self.screen_width, "height": self.screen_height},
             "grid": {"columns": self.grid.cols, "rows": self.grid.rows},
             "analysis": analysis
         }
+        if change is not None:
+            result["unchanged"] = False
+            result["changed_region"] = self._region_cells(change["region"])
+        if thumbnail is not None and not analysis.startswith(VISION_ERROR_PREFIXES):
+            self._last_observation = (thumbnail, focus, result)
+        return result
+    
+    def _region_cells(self, region: tuple) -> str:
+        """Grid cell range (e.g. 'C5:H9') covering a region given as screen fractions."""
+        left, top, right, bottom = region
+        first = self.grid.coordinates_to_cell(left * self.screen_width, top * self.screen_height)
+        last = self.grid.coordinates_to_cell(right * self.screen_width - 1, bottom * self.screen_height - 1)
+        return first if first == last else f"{first}:{last}"
     
     def _find_element(self, description: str, return_multiple: bool = False) -> dict:
         """
         Find a UI element by visual description and return its GRID CELL.
+        
+        Elements already located by find_elements_batch on the unchanged frame
+        are answered from the cache. Single elements are located coarse-to-fine
+        (see _locate_two_stage) unless VisionLocatorConfig.MODE is "grid".
         """
-        prompt = f"""Find the UI element: "{description}"
-
-The screen has a {self.grid.cols}x{self.grid.rows} grid overlay.
-Columns: A-{chr(ord('A') + self.grid.cols - 1)} (left to right)
-Rows: 1-{self.grid.rows} (top to bottom)
-
-{"Find ALL matching elements." if return_multiple else "Find the BEST matching element."}
-
-Respond in this EXACT format:
-FOUND: yes/no
-ELEMENT:
-- description: [what you found]
-- cell: [grid cell like B3, F12]
-- confidence: [high/medium/low]
-
-If the element spans multiple cells, give the CENTER cell.
-If not found, explain what you see instead."""
-
-        result = self._call_vision_model(prompt, add_grid=True)
+        img = self.env.screenshot_image() if PIL_AVAILABLE else None
+        if not return_multiple:
+            located = self._cached_location(img, description)
+            if located is not None:
+                return located
+            if VisionLocatorConfig.MODE == "two_stage" and img is not None:
+                located = self._locate_two_stage(description, img)
+                if located is not None:
+                    return located
+        
+        prompt = self._locate_prompt(description, self.grid, return_multiple)
+        result = self._call_vision_model(
+            prompt, add_grid=True, image=img, stop_when=None if return_multiple else locate_answer_complete
+        )
         
         # Parse the response to extract cell reference
-        cells = self._parse_cells(result)
+        fields = parse_answer_fields(result, complete=True)
+        cells = self._located_cells(result, fields)
         
         if cells:
             cell = cells[0]
@@ -592,6 +850,7 @@ If not found, explain what you see instead."""
                 "description": description,
                 "cell": cell,
                 "coordinates": {"x": coords[0], "y": coords[1]} if coords else None,
+                "confidence": fields.get("confidence"),
                 "raw_analysis": result
             }
         else:
@@ -601,10 +860,175 @@ If not found, explain what you see instead."""
                 "analysis": result
             }
     
+    def _locate_prompt(self, description: str, grid: GridOverlay, return_multiple: bool = False,
+                       zoomed: bool = False) -> str:
+        """FOUND/cell/confidence prompt for locating an element on a grid."""
+        zoom_note = "\nThis image is a zoomed-in part of the screen; the grid covers only this part.\n" if zoomed else ""
+        return f"""Find the UI element: "{description}"
+{zoom_note}
+The screen has a {grid.cols}x{grid.rows} grid overlay.
+Columns: A-{chr(ord('A') + grid.cols - 1)} (left to right)
+Rows: 1-{grid.rows} (top to bottom)
+
+{"Find ALL matching elements." if return_multiple else "Find the BEST matching element."}
+
+Respond in this EXACT format:
+FOUND: yes/no
+ELEMENT:
+- description: [what you found]
+- cell: [grid cell like B3, F12]
+- confidence: [high/medium/low]
+
+If the element spans multiple cells, give the CENTER cell.
+If not found, explain what you see instead."""
+    
+    def _locate_two_stage(self, description: str, img) -> dict:
+        """
+        Locate an element coarse-to-fine with two small images instead of one dense one.
+        
+        A low-resolution screenshot with a coarse grid picks the region; only
+        that region (plus a margin), cropped and scaled up, gets a fine grid for
+        the exact cell. The fine cell maps back to device coordinates through
+        the crop, and the result also names the full-screen grid cell.
+        
+        Returns a find_element result, or None if the coarse stage gave no usable
+        cell (the caller then falls back to the single full-screen grid).
+        """
+        coarse = self.grid.subgrid(self.grid.region, VisionLocatorConfig.COARSE_COLS, VisionLocatorConfig.COARSE_ROWS)
+        coarse_answer = self._call_vision_model(
+            self._locate_prompt(description, coarse), image=img, grid=coarse,
+            max_edge=VisionLocatorConfig.COARSE_MAX_EDGE, stop_when=locate_answer_complete
+        )
+        fields = parse_answer_fields(coarse_answer, complete=True)
+        if fields.get("found") is False:
+            return {"status": "not_found", "description": description, "analysis": coarse_answer}
+        bounds = coarse.cell_bounds(fields["cell"]) if "cell" in fields else None
+        if bounds is None:
+            return None
+        
+        margin_x = int(coarse.cell_width * VisionLocatorConfig.MARGIN)
+        margin_y = int(coarse.cell_height * VisionLocatorConfig.MARGIN)
+        region = (max(0, bounds[0] - margin_x), max(0, bounds[1] - margin_y),
+                  min(self.screen_width, bounds[2] + margin_x), min(self.screen_height, bounds[3] + margin_y))
+        fine = self.grid.subgrid(region, VisionLocatorConfig.FINE_COLS, VisionLocatorConfig.FINE_ROWS)
+        result = self._call_vision_model(
+            self._locate_prompt(description, fine, zoomed=True), image=img, grid=fine,
+            max_edge=VisionLocatorConfig.FINE_MAX_EDGE, stop_when=locate_answer_complete
+        )
+        fields = parse_answer_fields(result, complete=True)
+        cells = self._located_cells(result, fields, fine)
+        if not cells:
+            return {"status": "not_found", "description": description, "analysis": result, "region": region}
+        
+        x, y = fine.cell_to_coordinates(cells[0])
+        return {
+            "status": "success",
+            "description": description,
+            "cell": self.grid.coordinates_to_cell(x, y),
+            "coordinates": {"x": x, "y": y},
+            "confidence": fields.get("confidence"),
+            "zoom_cell": cells[0],
+            "precise": True,
+            "region": {"left": region[0], "top": region[1], "right": region[2], "bottom": region[3]},
+            "raw_analysis": result
+        }
+    
+    def _find_elements_batch(self, descriptions: list) -> dict:
+        """
+        Find several UI elements with one image upload and one vision call.
+        
+        Located elements are cached per (frame, description) until the next
+        screen action, so find_element/tap_element for them needs no model call.
+        
+        Args:
+            descriptions: Element descriptions, e.g. ["username field", "password field", "Log in button"]
+        """
+        if isinstance(descriptions, str):
+            descriptions = [descriptions]
+        if not descriptions:
+            return {"status": "error", "message": "No element descriptions given"}
+        
+        img = self.env.screenshot_image() if PIL_AVAILABLE else None
+        listing = "\n".join(f'{number}. "{description}"' for number, description in enumerate(descriptions, 1))
+        prompt = f"""Find each of these UI elements:
+{listing}
+
+The screen has a {self.grid.cols}x{self.grid.rows} grid overlay.
+Columns: A-{chr(ord('A') + self.grid.cols - 1)} (left to right)
+Rows: 1-{self.grid.rows} (top to bottom)
+
+Respond with EXACTLY one line per element, in the same order, in this format:
+<number>. FOUND: yes/no | cell: [grid cell like B3, F12, or - if not found] | confidence: [high/medium/low]
+
+If an element spans multiple cells, give the CENTER cell."""
+
+        count = len(descriptions)
+        result = self._call_vision_model(
+            prompt, add_grid=True, image=img, stop_when=lambda text: len(parse_batch_answer(text)) >= count
+        )
+        if result.startswith(VISION_ERROR_PREFIXES):
+            return {"status": "error", "message": result}
+        
+        answers = parse_batch_answer(result, complete=True)
+        frame_hash = self._frame_hash(img)
+        results = []
+        for number, description in enumerate(descriptions, 1):
+            fields = answers.get(number, {})
+            coords = self.grid.cell_to_coordinates(fields["cell"]) if fields.get("found") and "cell" in fields else None
+            if coords is None:
+                results.append({"status": "not_found", "description": description})
+                continue
+            located = {
+                "status": "success",
+                "description": description,
+                "cell": fields["cell"],
+                "coordinates": {"x": coords[0], "y": coords[1]},
+                "confidence": fields.get("confidence")
+            }
+            if frame_hash is not None:
+                self.vision_cache.put(self._location_key(frame_hash, description), located, self.last_image)
+            results.append(located)
+        
+        return {
+            "status": "success",
+            "found": sum(1 for located in results if located["status"] == "success"),
+            "results": results,
+            "raw_analysis": result
+        }
+    
+    def _frame_hash(self, img) -> int:
+        """Perceptual hash of a frame for cache keys, or None when caching is off."""
+        if self.vision_cache is None or img is None:
+            return None
+        return perceptual_hash(img, VisionCacheConfig.HASH_SIZE)
+    
+    def _location_key(self, frame_hash: int, description: str) -> tuple:
+        return self.vision_cache.key(frame_hash, description.lower(), NVIDIA_VISION_MODEL, "locate")
+    
+    def _cached_location(self, img, description: str):
+        """A find_elements_batch result for this description on this frame, or None."""
+        frame_hash = self._frame_hash(img)
+        if frame_hash is None:
+            return None
+        cached = self.vision_cache.get(self._location_key(frame_hash, description))
+        if cached is None:
+            return None
+        located, self.last_image = cached
+        return dict(located, description=description, cached=True)
+    
     def _find_text(self, text: str, partial_match: bool = False) -> dict:
         """
         Find specific text on screen and return its GRID CELL.
+        
+        The text is looked up in the UI hierarchy first (milliseconds, exact
+        bounds); the vision model is only asked when the tree has no visible
+        match, e.g. for text rendered in images, canvases or games.
         """
+        if VisionLocatorConfig.TEXT_FROM_TREE:
+            located = self._find_text_in_tree(text, partial_match)
+            if located is not None:
+                return located
+        
         match_type = "containing" if partial_match else "exactly matching"
         
         prompt = f"""Find text {match_type}: "{text}"
@@ -620,8 +1044,9 @@ TEXT:
 
 If not found, describe what text IS visible."""
 
-        result = self._call_vision_model(prompt, add_grid=True)
-        cells = self._parse_cells(result)
+        result = self._call_vision_model(prompt, add_grid=True, stop_when=locate_answer_complete)
+        fields = parse_answer_fields(result, complete=True)
+        cells = self._located_cells(result, fields)
         
         if cells:
             cell = cells[0]
@@ -631,6 +1056,7 @@ If not found, describe what text IS visible."""
                 "search_text": text,
                 "cell": cell,
                 "coordinates": {"x": coords[0], "y": coords[1]} if coords else None,
+                "confidence": fields.get("confidence"),
                 "raw_analysis": result
             }
         else:
@@ -640,19 +1066,52 @@ If not found, describe what text IS visible."""
                 "analysis": result
             }
     
-    def _parse_cells(self, response: str) -> list:
+    def _located_cells(self, response: str, fields: dict, grid: GridOverlay = None) -> list:
+        """
+        Cells of a locate answer: the structured `cell:` field when valid, else any
+        cell references after the reasoning. Empty when the model answered FOUND: no.
+        """
+        grid = grid or self.grid
+        if fields.get("found") is False:
+            return []
+        if "cell" in fields and grid.cell_to_coordinates(fields["cell"]):
+            return [fields["cell"]]
+        return self._parse_cells(answer_text(response) or response, grid)
+    
+    def _find_text_in_tree(self, text: str, partial_match: bool = False) -> dict:
+        """find_text result from the UI hierarchy, or None if the tree has no visible match."""
+        lookup = self.env.locate_text(text, partial=partial_match, limit=1)
+        if lookup["status"] != "success" or not lookup["matches"]:
+            return None
+        match = lookup["matches"][0]
+        x, y = match["center"]["x"], match["center"]["y"]
+        print(f"[VisionAgent] Found text {text!r} in the UI tree (score {match['score']})")
+        return {
+            "status": "success",
+            "search_text": text,
+            "cell": self.grid.coordinates_to_cell(x, y),
+            "coordinates": {"x": x, "y": y},
+            "bounds": match["bounds"],
+            "matched_text": match.get("text") or match.get("content_desc"),
+            "match_score": match["score"],
+            "source": "ui_tree",
+            "precise": True
+        }
+    
+    def _parse_cells(self, response: str, grid: GridOverlay = None) -> list:
         """Parse grid cell references from vision model response."""
+        grid = grid or self.grid
         cells = []
         
-        # Look for cell patterns like A1, B12, J20
-        pattern = r'\b([A-Ja-j])(\d{1,2})\b'
+        # Look for cell patterns like A1, B12, T40 (columns beyond the grid are dropped below)
+        pattern = r'\b([A-Za-z])(\d{1,2})\b'
         matches = re.findall(pattern, response)
         
         for col, row in matches:
             col = col.upper()
             row_num = int(row)
             # Validate it's within our grid
-            if ord(col) - ord('A') < self.grid.cols and 1 <= row_num <= self.grid.rows:
+            if ord(col) - ord('A') < grid.cols and 1 <= row_num <= grid.rows:
                 cell = f"{col}{row_num}"
                 if cell not in cells:
                     cells.append(cell)
@@ -660,7 +1119,7 @@ If not found, describe what text IS visible."""
         return cells
     
     def _parse_coordinates(self, response: str) -> list:
-        """Legacy: Parse coordinates from vision model response."""
+        """Legacy: Parse coordinates (in pixels of the image sent) from vision model response as device coordinates."""
         coords = []
         lines = response.split('\n')
         current_x, current_y = None, None
@@ -674,6 +1133,9 @@ If not found, describe what text IS visible."""
             if y_match:
                 current_y = int(y_match.group(1))
             if current_x is not None and current_y is not None:
+                if self.last_image is not None:
+                    # The model saw a possibly downscaled image
+                    current_x, current_y = self.last_image.to_device(current_x, current_y)
                 if 0 <= current_x <= self.screen_width and 0 <= current_y <= self.screen_height:
                     coords.append({"x": current_x, "y": current_y})
                 current_x, current_y = None, None
@@ -692,19 +1154,20 @@ If not found, describe what text IS visible."""
                 "search_result": find_result
             }
         
-        # Tap using the cell reference
+        # Tap using the cell reference, unless the locate found a finer point
         cell = find_result.get("cell")
-        if cell:
+        if cell and not find_result.get("precise"):
             return self._tap_cell(cell)
         
         # Fallback to coordinates if available
         coords = find_result.get("coordinates")
         if coords:
-            tap_result = self.env.tap_coordinates(coords["x"], coords["y"])
+            tap_result = self.env.tap_coordinates(coords["x"], coords["y"], snap=self._snap_taps())
             return {
                 "status": "success",
                 "action": "tap_element",
                 "description": description,
+                "cell": cell,
                 "coordinates": coords,
                 "tap_result": tap_result
             }
@@ -722,9 +1185,9 @@ If not found, describe what text IS visible."""
                 "search_result": find_result
             }
         
-        # Tap using the cell reference
+        # Tap using the cell reference, unless the text's exact bounds are known
         cell = find_result.get("cell")
-        if cell:
+        if cell and not find_result.get("precise"):
             result = self._tap_cell(cell)
             result["text"] = text
             return result
@@ -732,11 +1195,12 @@ If not found, describe what text IS visible."""
         # Fallback to coordinates
         coords = find_result.get("coordinates")
         if coords:
-            tap_result = self.env.tap_coordinates(coords["x"], coords["y"])
+            tap_result = self.env.tap_coordinates(coords["x"], coords["y"], snap=self._snap_taps())
             return {
                 "status": "success",
                 "action": "tap_text",
                 "text": text,
+                "cell": cell,
                 "coordinates": coords,
                 "tap_result": tap_result
             }
@@ -0,0 +1,84 @@
+"""
+Vision response cache for Amadeus.
+Remembers vision model answers per (screen, prompt, model) so repeated questions
+about an unchanged frame are answered without another model call.
+"""
+
+import os
+import sys
+import re
+import time
+from collections import OrderedDict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import VisionCacheConfig
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt with whitespace collapsed, so formatting differences still hit."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+class VisionCache:
+    """
+    LRU + TTL cache of vision model answers keyed by frame hash, prompt and model.
+
+    Entries also carry the EncodedImage that was sent, so coordinates in a
+    cached answer still map back to the device. Besides raw answers, located
+    elements from batch calls are stored per description.
+
+    Call invalidate() whenever an action may have changed the screen: a
+    perceptual hash can miss small repaints, so actions are what make entries
+    stale.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+                (default VisionCacheConfig.MAX_ENTRIES)
+            ttl: Seconds an entry stays valid (default VisionCacheConfig.TTL)
+        """
+        self.max_entries = VisionCacheConfig.MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = VisionCacheConfig.TTL if ttl is None else ttl
+        self._entries = OrderedDict()  # key -> (stored_at, answer, encoded image)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(frame_hash: int, prompt: str, model: str, *options) -> tuple:
+        """Cache key; options are anything else that changes the answer (grid, think mode)."""
+        return (frame_hash, normalize_prompt(prompt), model) + options
+
+    def get(self, key: tuple):
+        """(answer, encoded image) for a key, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1], entry[2]
+
+    def put(self, key: tuple, answer, encoded=None):
+        """Store an answer (text or located-element dict), evicting the least recently used beyond max_entries."""
+        self._entries[key] = (time.monotonic(), answer, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self):
+        """Forget every answer (the screen may have changed)."""
+        if self._entries:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def __len__(self):
+        return len(self._entries)
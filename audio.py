@@ -6,15 +6,15 @@ import time
 import io
 import pvporcupine
 import pyaudio
-from groq import Groq
+from client import get_groq_client
 from load_env import groq_API, pvporcupine_mac_API, pvporcupine_win_API
 
 porcupine = pvporcupine.create(keywords=["Hello Amadeus"],
                                access_key=pvporcupine_win_API,
                                keyword_paths=["Hello-Amadeus_win.ppn"])
 
-# Initialize Groq client
-client = Groq(api_key=groq_API)
+# Shared Groq client (pooled keep-alive connection)
+client = get_groq_client(groq_API)
 
 
 def record_to_wav(pa, stream, duration_s, channels=1):
@@ -1,8 +1,109 @@
 from openai import OpenAI
 import os
+import threading
+import httpx
 from tools.tools import Tool
 from config import APIConfig, AgentConfig
 
+try:
+    import h2  # noqa: F401 - only needed for httpx's HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared provider clients, keyed by (kind, base_url, api_key)
+_clients = {}
+_request_counts = {}
+_clients_lock = threading.Lock()
+
+
+def _count_request(key):
+    def hook(request):
+        _request_counts[key] = _request_counts.get(key, 0) + 1
+    return hook
+
+
+def get_http_client(base_url: str, api_key: str = None) -> httpx.Client:
+    """
+    Shared keep-alive HTTP client for a provider.
+
+    One connection pool per (base_url, api_key), so TLS and connection setup
+    are paid once per process instead of once per call. Speaks HTTP/2 when
+    the h2 package is installed.
+    """
+    key = ("http", base_url, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = httpx.Client(
+                http2=HTTP2_AVAILABLE and APIConfig.HTTP2,
+                timeout=APIConfig.HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=APIConfig.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=APIConfig.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=APIConfig.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                event_hooks={"request": [_count_request(key)]},
+            )
+            _clients[key] = client
+        return client
+
+
+def get_openai_client(base_url: str = None, api_key: str = None) -> OpenAI:
+    """Shared OpenAI-compatible client (defaults: the configured provider) on a pooled connection."""
+    base_url = base_url or APIConfig.get_base_url()
+    api_key = api_key or APIConfig.get_api_key()
+    key = ("openai", base_url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        http_client = get_http_client(base_url, api_key)
+        with _clients_lock:
+            client = _clients.setdefault(key, OpenAI(api_key=api_key, base_url=base_url, http_client=http_client))
+    return client
+
+
+def get_groq_client(api_key: str = None):
+    """Shared Groq client (audio) on a pooled connection."""
+    from groq import Groq
+
+    api_key = api_key or APIConfig.GROQ_API_KEY
+    key = ("groq", None, api_key)
+    client = _clients.get(key)
+    if client is None:
+        http_client = get_http_client("https://api.groq.com", api_key)
+        with _clients_lock:
+            client = _clients.setdefault(key, Groq(api_key=api_key, http_client=http_client))
+    return client
+
+
+def pool_stats() -> list:
+    """Requests and open/idle connections of every shared HTTP pool."""
+    stats = []
+    with _clients_lock:
+        for key, client in _clients.items():
+            if key[0] != "http":
+                continue
+            # httpcore keeps its connections on the transport's pool (not public API, hence getattr)
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            stats.append({
+                "base_url": key[1],
+                "requests": _request_counts.get(key, 0),
+                "connections": len(connections),
+                "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+                "http2": any(conn.info().startswith("HTTP/2") for conn in connections if hasattr(conn, "info")),
+            })
+    return stats
+
+
+def close_clients():
+    """Close every shared connection pool."""
+    with _clients_lock:
+        for key, client in _clients.items():
+            if key[0] == "http":
+                client.close()
+        _clients.clear()
+
 
 class Client:
     def __init__(
@@ -20,10 +121,7 @@ class Client:
         key = api_key or APIConfig.get_api_key()
         base_url = base or APIConfig.get_base_url()
 
-        self.client = OpenAI(
-            api_key=key,
-            base_url=base_url
-        )
+        self.client = get_openai_client(base_url, key)
         self.model = model
         self.messages = messages or []
         self.temperature = temperature or AgentConfig.TEMPERATURE
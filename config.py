@@ -92,6 +92,14 @@ class APIConfig:
     # Groq (for audio)
     GROQ_API_KEY = os.environ.get("groq_API")
 
+    # Shared HTTP connection pools (one per base URL + API key)
+    HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+    HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", 10))
+    HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 120))
+    HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 60))
+    # HTTP/2 is used when the h2 package is installed, unless disabled here
+    HTTP2 = os.environ.get("HTTP2", "true").lower() == "true"
+
     @classmethod
     def get_api_key(cls):
         """Get the API key for the selected provider."""
@@ -183,10 +191,13 @@ class AppiumConfig:
     AUTO_GRANT_PERMISSIONS = os.environ.get("APPIUM_AUTO_GRANT", "true").lower() == "true"
     DISABLE_ANIMATIONS = os.environ.get("APPIUM_DISABLE_ANIM", "true").lower() == "true"
 
+    # First UiAutomator2 system port handed out by the device pool (one per device)
+    BASE_SYSTEM_PORT = int(os.environ.get("APPIUM_SYSTEM_PORT", 8200))
+
     @classmethod
-    def get_capabilities(cls):
-        """Get the full Appium capabilities dict."""
-        return {
+    def get_capabilities(cls, udid: str = None, system_port: int = None):
+        """Get the full Appium capabilities dict, optionally pinned to one device."""
+        capabilities = {
             "platformName": "Android",
             "automationName": "UiAutomator2",
             "deviceName": cls.DEVICE_NAME,
@@ -202,6 +213,119 @@ class AppiumConfig:
             "adbExecTimeout": cls.ADB_EXEC_TIMEOUT,
             "settings[waitForIdleTimeout]": cls.WAIT_FOR_IDLE_TIMEOUT,
         }
+        if udid:
+            capabilities["udid"] = udid
+        if system_port:
+            capabilities["systemPort"] = system_port
+        return capabilities
+
+
+# =============================================================================
+# Environment Configuration
+# =============================================================================
+
+class EnvironmentConfig:
+    """Android environment behaviour."""
+
+    # UI hierarchy parser: "stream" (incremental pull parser) or "tree" (legacy recursive walk)
+    HIERARCHY_PARSER = os.environ.get("HIERARCHY_PARSER", "stream").lower()
+
+    # Screen settle detection (seconds)
+    AUTO_SETTLE = os.environ.get("AUTO_SETTLE", "false").lower() == "true"
+    SETTLE_TIMEOUT = float(os.environ.get("SETTLE_TIMEOUT", 3.0))
+    SETTLE_POLL_INTERVAL = float(os.environ.get("SETTLE_POLL_INTERVAL", 0.05))
+    SETTLE_MAX_POLL_INTERVAL = float(os.environ.get("SETTLE_MAX_POLL_INTERVAL", 0.5))
+    # Without a visible change since the action, the screen must stay the same this long to count as settled
+    SETTLE_MIN_QUIET = float(os.environ.get("SETTLE_MIN_QUIET", 0.5))
+    # open_app waits up to this long for the app to reach the foreground
+    APP_LAUNCH_TIMEOUT = float(os.environ.get("APP_LAUNCH_TIMEOUT", 10.0))
+    FOCUS_TIMEOUT = float(os.environ.get("FOCUS_TIMEOUT", 1.0))
+
+    # Gesture/key injection: "appium" (W3C actions) or "adb" (persistent adb shell)
+    INPUT_BACKEND = os.environ.get("INPUT_BACKEND", "appium").lower()
+
+    # Screenshots: "appium" (PNG from the driver) or "adb" (raw framebuffer via screencap)
+    SCREENSHOT_BACKEND = os.environ.get("SCREENSHOT_BACKEND", "appium").lower()
+
+    # Seconds before the cached installed-app inventory is re-read
+    APP_INVENTORY_TTL = float(os.environ.get("APP_INVENTORY_TTL", 600))
+
+    # type_text: resolve the field from the cached snapshot and inject text with one shell command
+    FAST_TEXT_INPUT = os.environ.get("FAST_TEXT_INPUT", "true").lower() == "true"
+    # Longer (or non-ASCII) text is pasted from the clipboard instead of `input text`
+    MAX_INPUT_TEXT_LENGTH = int(os.environ.get("MAX_INPUT_TEXT_LENGTH", 200))
+    # Seconds the fast path waits after tapping the field, for focus and the IME to come up
+    FOCUS_DELAY = float(os.environ.get("FOCUS_DELAY", 0.3))
+
+    # Coordinate taps: snap near misses (within SNAP_RADIUS px) to the closest clickable element
+    SNAP_TAPS = os.environ.get("SNAP_TAPS", "true").lower() == "true"
+    SNAP_RADIUS = int(os.environ.get("SNAP_RADIUS", 48))
+
+    # Visibility pass (needs NumPy): "drop" elements less than VISIBILITY_THRESHOLD visible
+    # (clipped off screen or covered), "flag" them with their visible fraction, or "off"
+    VISIBILITY_MODE = os.environ.get("VISIBILITY_MODE", "drop").lower()
+    VISIBILITY_THRESHOLD = float(os.environ.get("VISIBILITY_THRESHOLD", 0.1))
+
+
+# =============================================================================
+# Vision Image Configuration
+# =============================================================================
+
+class VisionImageConfig:
+    """Screenshot encoding for vision model calls."""
+
+    # Longest image edge in pixels after downscaling (0 = send at device resolution)
+    MAX_EDGE = int(os.environ.get("VISION_IMAGE_MAX_EDGE", 1280))
+    # "png", "jpeg" or "webp"; QUALITY applies to JPEG/WebP
+    FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "jpeg").lower()
+    QUALITY = int(os.environ.get("VISION_IMAGE_QUALITY", 85))
+    # Drop color when the task doesn't need it (the grid overlay stays colored)
+    GRAYSCALE = os.environ.get("VISION_IMAGE_GRAYSCALE", "false").lower() == "true"
+
+
+# =============================================================================
+# Vision Cache Configuration
+# =============================================================================
+
+class VisionCacheConfig:
+    """Reuse of vision model answers for unchanged screens."""
+
+    ENABLED = os.environ.get("VISION_CACHE", "true").lower() == "true"
+    MAX_ENTRIES = int(os.environ.get("VISION_CACHE_SIZE", 64))
+    TTL = float(os.environ.get("VISION_CACHE_TTL", 120))  # seconds
+    # Perceptual hash side length: HASH_SIZE^2 bits describe a frame
+    HASH_SIZE = int(os.environ.get("VISION_HASH_SIZE", 16))
+
+    # observe_screen reuses the previous analysis while at most this fraction of the
+    # screen (ignoring the status bar at the top) changed since it was made
+    UNCHANGED_THRESHOLD = float(os.environ.get("VISION_UNCHANGED_THRESHOLD", 0.0))
+    STATUS_BAR_FRACTION = float(os.environ.get("VISION_STATUS_BAR_FRACTION", 0.035))
+
+
+# =============================================================================
+# Vision Locator Configuration
+# =============================================================================
+
+class VisionLocatorConfig:
+    """How find_element/tap_element locate elements on screen."""
+
+    # "two_stage": coarse grid on a small image picks a region, then a fine grid on
+    # that crop picks the cell; "grid": one call with the full-screen grid
+    MODE = os.environ.get("VISION_LOCATOR", "two_stage").lower()
+    COARSE_COLS = int(os.environ.get("VISION_COARSE_COLS", 4))
+    COARSE_ROWS = int(os.environ.get("VISION_COARSE_ROWS", 8))
+    COARSE_MAX_EDGE = int(os.environ.get("VISION_COARSE_MAX_EDGE", 640))
+    FINE_COLS = int(os.environ.get("VISION_FINE_COLS", 12))
+    FINE_ROWS = int(os.environ.get("VISION_FINE_ROWS", 12))
+    FINE_MAX_EDGE = int(os.environ.get("VISION_FINE_MAX_EDGE", 640))
+    # The crop extends this fraction of a coarse cell past each side of the chosen one
+    MARGIN = float(os.environ.get("VISION_LOCATOR_MARGIN", 0.5))
+    # find_text/tap_text look the text up in the UI hierarchy before asking the vision model
+    TEXT_FROM_TREE = os.environ.get("VISION_TEXT_FROM_TREE", "true").lower() == "true"
+    # Snapping vision taps onto the element under them: "snapshot" reuses the current UI
+    # snapshot when no action has run since it was taken (no extra page source read),
+    # "refresh" re-reads the screen before every tap, "off" taps the raw point
+    SNAP_TAPS = os.environ.get("VISION_SNAP_TAPS", "snapshot").lower()
 
 
 # =============================================================================
@@ -276,6 +400,14 @@ class AgentConfig:
     TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", 0.6))
     MAX_TOKENS = int(os.environ.get("LLM_MAX_TOKENS", 2000))
 
+    # Element list encoding sent to the model: "json" (list of dicts) or "compact" (table)
+    ELEMENT_FORMAT = os.environ.get("ELEMENT_FORMAT", "json").lower()
+    # Tally what each element list would cost in both formats (reported once at the end of a run)
+    MEASURE_ELEMENT_TOKENS = os.environ.get("MEASURE_ELEMENT_TOKENS", "false").lower() == "true"
+
+    # Stream vision answers and stop reading once the located cell is known
+    STREAM_VISION = os.environ.get("STREAM_VISION", "true").lower() == "true"
+
 
 # =============================================================================
 # Environment Setup Helper
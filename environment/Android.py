@@ -17,10 +17,21 @@ from selenium.webdriver import Keys
 from selenium.webdriver.common.actions.action_builder import ActionBuilder
 from selenium.webdriver.common.actions.pointer_input import PointerInput
 
+import shlex
 import xml.etree.ElementTree as ET
-import re
+from io import BytesIO
 
-from config import AppiumConfig, setup_android_environment
+from config import AppiumConfig, EnvironmentConfig, setup_android_environment
+from environment.hierarchy import collect_tree_elements, iter_screen_elements, fingerprint_page_source
+from environment.filters import compile_filters
+from environment.elements import ElementTable, match_text
+from environment.query import SelectorError, compile_selector
+from environment.visibility import apply_visibility
+from environment.element_format import encode_elements
+from environment.diff import diff_records, carry_over_indexes, describe_change
+from environment.adb import AdbInputBackend, capture_framebuffer
+from environment.imaging import Image, encode_image
+from environment.apps import AppInventory
 
 # Ensure Android SDK environment is set up
 setup_android_environment()
@@ -56,6 +67,10 @@ KEY_CODES = {
     "tab": 61,
 }
 
+# Editing key codes used by the fast text input path
+KEYCODE_MOVE_END = 123
+KEYCODE_PASTE = 279
+
 # Scroll amount percentages
 SCROLL_AMOUNTS = {
     "small": 0.25,
@@ -65,26 +80,29 @@ SCROLL_AMOUNTS = {
 }
 
 
-def parse_bounds(bounds_str):
-    """
-    Parses a bounds string formatted as "[left,top][right,bottom]".
-    Returns a tuple: (left, top, right, bottom), or (0,0,0,0) if parsing fails.
-    """
-    matches = re.findall(r'\d+', bounds_str)
-    if len(matches) >= 4:
-        return tuple(map(int, matches[:4]))
-    return (0, 0, 0, 0)
-
-
 class Android:
     """
     Android device automation class providing comprehensive UI interaction.
     Uses Appium with UiAutomator2 for reliable element detection and actions.
     """
     
-    def __init__(self):
+    def __init__(self, hierarchy_parser: str = None, auto_settle: bool = None, input_backend: str = None,
+                 screenshot_backend: str = None, udid: str = None, system_port: int = None):
+        """
+        Args:
+            hierarchy_parser: "stream" (incremental single pass) or "tree" (legacy recursive walk).
+                Defaults to EnvironmentConfig.HIERARCHY_PARSER.
+            auto_settle: Wait for the UI to settle after every mutating action.
+                Defaults to EnvironmentConfig.AUTO_SETTLE.
+            input_backend: "appium" (W3C actions) or "adb" (persistent adb shell `input`).
+                Defaults to EnvironmentConfig.INPUT_BACKEND.
+            screenshot_backend: "appium" (PNG from the driver) or "adb" (raw framebuffer via screencap).
+                Defaults to EnvironmentConfig.SCREENSHOT_BACKEND.
+            udid: Serial of the device to drive (default: whichever device Appium picks)
+            system_port: UiAutomator2 system port, must be unique per device on one Appium server
+        """
         # Use centralized config for capabilities
-        self.capabilities = AppiumConfig.get_capabilities()
+        self.capabilities = AppiumConfig.get_capabilities(udid=udid, system_port=system_port)
         self.driver = webdriver.Remote(
             AppiumConfig.SERVER_URL,
             options=UiAutomator2Options().load_capabilities(self.capabilities)
@@ -93,100 +111,321 @@ class Android:
         self.window_size = self.driver.get_window_size()
         self.screen_width = self.window_size["width"]
         self.screen_height = self.window_size["height"]
-        self.elements_cache = []  # Renamed for clarity
+        self.elements = ElementTable()  # Snapshot from the last get_screen_elements
+        self._snapshot_key = None  # (page source fingerprint, filters, include_all) of that snapshot
+        self._snapshot_args = (None, False)  # (filters, include_all) it was taken with
+        self._snapshot_stale = True  # An action ran since the snapshot was taken
+        self._settle_pending = False  # The last action didn't wait for the UI to settle
+        self._settle_before = None  # Page source fingerprint from before that action, if known
         self.current_app = ''
+        self.hierarchy_parser = (hierarchy_parser or EnvironmentConfig.HIERARCHY_PARSER).lower()
+        self.auto_settle = EnvironmentConfig.AUTO_SETTLE if auto_settle is None else auto_settle
+        self.udid = udid or self.driver.capabilities.get("deviceUDID")
+        self.input_backend = (input_backend or EnvironmentConfig.INPUT_BACKEND).lower()
+        self.adb_input = AdbInputBackend(self.udid) if self.input_backend == "adb" else None
+        self.screenshot_backend = (screenshot_backend or EnvironmentConfig.SCREENSHOT_BACKEND).lower()
+        self.apps = AppInventory(self._shell, aliases=APP_PACKAGES, ttl=EnvironmentConfig.APP_INVENTORY_TTL)
+        self._shell_unavailable = False  # Appium refused `mobile: shell` (no --allow-insecure=adb_shell)
         
+    def _shell(self, command: str, args: list) -> str:
+        """Run a shell command on the device through Appium (needs --allow-insecure=adb_shell)."""
+        return self.driver.execute_script("mobile: shell", {"command": command, "args": args})
+    
+    def _shell_script(self, script: str) -> str:
+        """Run a (possibly compound) shell command line, over the persistent adb shell when available."""
+        if self.adb_input:
+            return self.adb_input.shell.run(script)
+        return self._shell(script, [])
+    
+    @property
+    def has_shell(self) -> bool:
+        """False once Appium has refused a shell command; _shell_script would only fail again."""
+        return self.adb_input is not None or not self._shell_unavailable
+    
     def _create_action_builder(self):
         """Create a fresh ActionBuilder for each action to avoid state issues."""
         return ActionBuilder(self.driver, mouse=PointerInput("touch", "touch"))
     
-    def _get_element_center(self, bounds_str: str) -> tuple:
-        """Parse bounds string and return center coordinates."""
-        matches = re.findall(r'\[(\d+),(\d+)\]', bounds_str)
-        if len(matches) < 2:
-            return None, None
-        (x1, y1), (x2, y2) = map(lambda tup: (int(tup[0]), int(tup[1])), matches)
-        return (x1 + x2) // 2, (y1 + y2) // 2
-
-    def search_elements(self, element, counter, filters, include_all=False):
-        """Recursively search and collect UI elements from the XML tree."""
-        element_text = element.attrib.get("text", "").strip()
-        element_class = element.attrib.get("class", "")
-        content_desc = element.attrib.get("content-desc", "").strip()
-        clickable = element.attrib.get("clickable", "false") == "true"
-        focusable = element.attrib.get("focusable", "false") == "true"
-        enabled = element.attrib.get("enabled", "true") == "true"
-        resource_id = element.attrib.get("resource-id", "")
-
-        # Apply filters
-        filters = filters or {"filter": [], "class_filter": []}
-        if element_text in filters.get("filter", []):
-            for child in list(element):
-                self.search_elements(child, counter, filters, include_all)
-            return
-
-        if element_class in filters.get("class_filter", []):
-            for child in list(element):
-                self.search_elements(child, counter, filters, include_all)
-            return
-
-        bounds_attr = element.attrib.get("bounds", "")
-        left, top, right, bottom = parse_bounds(bounds_attr)
-        center_x = (left + right) // 2
-        center_y = (top + bottom) // 2
-
-        # Check if element is within screen bounds
-        if 0 <= center_x < self.screen_width and 0 <= center_y < self.screen_height:
-            # Determine if element should be included
-            is_interactive = clickable or focusable or element_class.endswith("EditText")
-            has_content = element_text or content_desc
-            
-            if include_all or (is_interactive and enabled) or has_content:
-                bounds_str = f"[{left},{top}][{right},{bottom}]"
-                info = {
-                    "index": counter[0],
-                    "text": element_text,
-                    "class": element_class.split('.')[-1] if element_class else "",  # Short class name
-                    "bounds": bounds_str,
-                    "content_desc": content_desc,
-                    "clickable": clickable,
-                    "resource_id": resource_id.split('/')[-1] if resource_id else "",  # Short resource ID
-                }
-                # Remove empty values except index
-                clean_info = {k: v for k, v in info.items() if v or k == "index"}
-                self.elements_cache.append(clean_info)
-                counter[0] += 1
-                
-        # Recurse into children
-        for child in list(element):
-            self.search_elements(child, counter, filters, include_all)
+    def _settle_after(self, result: dict, settle: bool = None, before: str = None) -> dict:
+        """
+        Wait for the UI to settle after a successful action if requested (or auto_settle is on).
+
+        `before` is the page source fingerprint from before the action; by default
+        that of the snapshot, if no action has run since it was taken.
+        """
+        if before is None and not self._snapshot_stale and self._snapshot_key is not None:
+            before = self._snapshot_key[0]
+        self._snapshot_stale = True
+        if settle is None:
+            settle = self.auto_settle
+        succeeded = result.get("status") == "success"
+        if settle and succeeded:
+            result["settle"] = self.wait_for_settle(before=before)
+        self._settle_pending = succeeded and not settle
+        self._settle_before = before
+        return result
+
+    def settle_pending(self):
+        """
+        Wait for the UI to settle after the last action if it didn't wait itself.
+
+        Returns the wait_for_settle result, or None when no action has run
+        since the last settle (nothing is read from the device then).
+        """
+        if not self._settle_pending:
+            return None
+        self._settle_pending = False
+        return self.wait_for_settle(before=self._settle_before)
+
+    @property
+    def elements_cache(self):
+        """Legacy view of the current snapshot as a list of element dicts."""
+        return self.elements.to_dicts()
+
+    def search_elements(self, element, records, filters, include_all=False, parent=None):
+        """
+        Recursively search and collect UI elements from the XML tree (legacy "tree" parser).
+
+        `filters` is a compiled ElementFilter (see compile_filters) or None.
+        """
+        collect_tree_elements(element, records, self.screen_width, self.screen_height, filters, include_all,
+                              parent=parent)
 
     # ==================== SCREEN ELEMENT FUNCTIONS ====================
     
-    def get_screen_elements(self, filters=None, include_all=False):
+    def get_screen_elements(self, filters=None, include_all=False, element_format: str = "json",
+                            since_last: bool = False):
         """
         Get all UI elements on the current screen.
         
         Args:
-            filters: Optional filter configuration
+            filters: Optional filter configuration (filter.json dict or compiled ElementFilter)
             include_all: If True, include non-interactive elements
+            element_format: "json" (list of element dicts) or "compact" (tab-separated table)
+            since_last: Return only what changed since the previous snapshot (taken with the
+                same filters): added elements, changed ones with their previous values and
+                the indexes of removed ones. Elements that are still there keep their index.
             
         Returns:
             List of element dictionaries with index, text, bounds, etc.
+            When the screen matches the previous snapshot, the cached table is
+            reused (indexes stay valid) and the result carries "unchanged": True.
+            With since_last the result has "mode": "since_last" (or "full" when
+            there is no comparable previous snapshot).
         """
-        self.elements_cache = []
         try:
+            element_filter = compile_filters(filters)
             page_source = self.driver.page_source
-            root = ET.fromstring(page_source)
-            counter = [0]
-            self.search_elements(root, counter, filters, include_all)
-            return {
+            snapshot_key = (
+                fingerprint_page_source(page_source),
+                element_filter.key if element_filter else "",
+                include_all,
+            )
+            self._snapshot_args = (filters, include_all)
+            self._snapshot_stale = False
+            previous = None
+            if since_last and self._snapshot_key is not None and self._snapshot_key[1:] == snapshot_key[1:]:
+                previous = self.elements
+            if snapshot_key == self._snapshot_key:
+                if previous is not None:
+                    return self._diff_result({"unchanged": previous.records, "changed": [], "added": [], "removed": []},
+                                             element_format, unchanged=True)
+                return {
+                    "status": "success",
+                    "unchanged": True,
+                    "element_count": len(self.elements),
+                    "elements": encode_elements(self.elements, element_format)
+                }
+
+            if self.hierarchy_parser == "tree":
+                records = []
+                self.search_elements(ET.fromstring(page_source), records, element_filter, include_all)
+            else:
+                records = iter_screen_elements(page_source, self.screen_width, self.screen_height, element_filter,
+                                               include_all)
+            if EnvironmentConfig.VISIBILITY_MODE != "off":
+                records = apply_visibility(records, self.screen_width, self.screen_height,
+                                           EnvironmentConfig.VISIBILITY_THRESHOLD,
+                                           drop=EnvironmentConfig.VISIBILITY_MODE == "drop")
+            if previous is not None:
+                records = list(records)
+                diff = diff_records(previous.records, records)
+                carry_over_indexes(diff, max((record.index for record in previous), default=-1) + 1)
+            self.elements = ElementTable(records)
+            self._snapshot_key = snapshot_key
+            if previous is not None:
+                return self._diff_result(diff, element_format)
+            result = {
                 "status": "success",
-                "element_count": len(self.elements_cache),
-                "elements": self.elements_cache
+                "element_count": len(self.elements),
+                "elements": encode_elements(self.elements, element_format)
             }
+            if since_last:
+                result["mode"] = "full"
+            return result
         except Exception as e:
+            self.elements = ElementTable()
+            self._snapshot_key = None
+            self._snapshot_stale = True
             return {"status": "error", "message": str(e), "elements": []}
+
+    def _diff_result(self, diff: dict, element_format: str, unchanged: bool = False) -> dict:
+        """Tool result for a since_last snapshot."""
+        result = {
+            "status": "success",
+            "mode": "since_last",
+            "element_count": len(self.elements),
+            "unchanged_count": len(diff["unchanged"]),
+            "added": encode_elements(diff["added"], element_format),
+            "changed": [describe_change(previous, record) for previous, record in diff["changed"]],
+            "removed_indexes": sorted(record.index for record in diff["removed"]),
+        }
+        if unchanged:
+            result["unchanged"] = True
+        return result
+
+    def query_elements(self, selector: str, limit: int = None, filters=None, element_format: str = "json"):
+        """
+        Find elements in the current snapshot with a CSS-like selector.
+
+        Runs locally against the cached hierarchy (no device round trip); a
+        snapshot is taken first only if there is none yet.
+
+        Args:
+            selector: Selector string, e.g. 'RecyclerView Button[text~=add]:clickable'
+            limit: Maximum number of matches to return
+            filters: Filter configuration used if a snapshot has to be taken
+            element_format: "json" (list of element dicts) or "compact" (tab-separated table)
+        """
+        try:
+            compiled = compile_selector(selector)
+        except SelectorError as e:
+            return {"status": "error", "message": str(e)}
+
+        if self._snapshot_key is None:
+            snapshot = self.get_screen_elements(filters=filters)
+            if snapshot["status"] != "success":
+                return {"status": "error", "message": snapshot["message"]}
+
+        matches = compiled.select(self.elements, limit=limit)
+        return {
+            "status": "success",
+            "selector": selector,
+            "match_count": len(matches),
+            "elements": encode_elements(matches, element_format)
+        }
+
+    def locate_text(self, text: str, partial: bool = False, limit: int = 5):
+        """
+        Find text on screen in the UI hierarchy (no screenshot, no vision model).
+
+        Reads a fresh page source including non-interactive elements, keeps the
+        visible ones and matches text and content descriptions exactly or
+        fuzzily. The current element snapshot (and its indexes) is left alone.
+
+        Args:
+            text: Text to look for
+            partial: Also match elements whose text contains it
+            limit: Maximum number of matches to return
+        """
+        try:
+            records = iter_screen_elements(self.driver.page_source, self.screen_width, self.screen_height,
+                                           include_all=True)
+            if EnvironmentConfig.VISIBILITY_MODE != "off":
+                records = [
+                    record for record in apply_visibility(records, self.screen_width, self.screen_height,
+                                                          EnvironmentConfig.VISIBILITY_THRESHOLD, drop=False)
+                    if record.visibility >= EnvironmentConfig.VISIBILITY_THRESHOLD
+                ]
+            matches = match_text(records, text, partial=partial)[:limit]
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+        results = []
+        for score, record in matches:
+            info = record.to_dict()
+            del info["index"]  # Not part of the agent's snapshot
+            info["center"] = {"x": record.center_x, "y": record.center_y}
+            info["score"] = round(score, 3)
+            results.append(info)
+        return {"status": "success", "text": text, "match_count": len(results), "matches": results}
+
+    def element_at(self, x: int, y: int, radius: int = None, refresh: bool = False):
+        """
+        Clickable element under a point in the current snapshot.
+
+        Returns the topmost clickable element containing (x, y), else the closest
+        one within `radius` pixels, else None. A stale snapshot (an action ran
+        since it was taken) is never used; refresh=True re-reads the screen instead.
+
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            radius: Near-miss tolerance in pixels (default EnvironmentConfig.SNAP_RADIUS)
+            refresh: Take a new snapshot first if the current one is missing or stale
+        """
+        if refresh and (self._snapshot_stale or self._snapshot_key is None):
+            self.get_screen_elements(*self._snapshot_args)
+        if self._snapshot_stale or self._snapshot_key is None:
+            return None
+        radius = EnvironmentConfig.SNAP_RADIUS if radius is None else radius
+        spatial = self.elements.spatial
+        return spatial.topmost(x, y) or spatial.nearest(x, y, radius)
+
+    def wait_for_settle(self, timeout: float = None, poll_interval: float = None, before: str = None,
+                        min_quiet: float = None):
+        """
+        Wait until the UI hierarchy stops changing.
+        
+        Polls the page source fingerprint with an exponentially growing interval.
+        The screen has settled when two consecutive samples match and either it
+        has changed from `before` (the fingerprint from before the action), or it
+        has stayed the same for `min_quiet` seconds - so a transition that starts
+        late (e.g. a cold app launch) isn't mistaken for a settled old screen.
+        Gives up when the timeout is hit.
+        
+        Args:
+            timeout: Maximum wait in seconds (default EnvironmentConfig.SETTLE_TIMEOUT)
+            poll_interval: First poll interval in seconds (default EnvironmentConfig.SETTLE_POLL_INTERVAL)
+            before: Page source fingerprint from before the action, if known
+            min_quiet: Seconds an unchanged screen must stay the same (default EnvironmentConfig.SETTLE_MIN_QUIET)
+        """
+        timeout = EnvironmentConfig.SETTLE_TIMEOUT if timeout is None else timeout
+        interval = poll_interval or EnvironmentConfig.SETTLE_POLL_INTERVAL
+        min_quiet = EnvironmentConfig.SETTLE_MIN_QUIET if min_quiet is None else min_quiet
+        start = time.monotonic()
+        deadline = start + timeout
+        previous = None
+        stable_since = start
+        changed = False
+        polls = 0
+        settled = False
+        
+        while True:
+            try:
+                current = fingerprint_page_source(self.driver.page_source)
+            except Exception:
+                current = None
+            polls += 1
+            now = time.monotonic()
+            if current is not None and before is not None and current != before:
+                changed = True
+            if current is not None and current == previous:
+                if changed or now - stable_since >= min_quiet:
+                    settled = True
+                    break
+            else:
+                stable_since = now
+            previous = current
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, EnvironmentConfig.SETTLE_MAX_POLL_INTERVAL)
+        
+        return {"settled": settled, "changed": changed, "elapsed_ms": int((time.monotonic() - start) * 1000),
+                "polls": polls}
     
     def get_device_info(self):
         """Get device and screen information."""
@@ -206,73 +445,85 @@ class Android:
 
     # ==================== TAP FUNCTIONS ====================
     
-    def tap(self, index: int):
+    def tap(self, index: int, settle: bool = None):
         """
         Tap on an element by its index from the elements cache.
         
         Args:
             index: Element index from get_screen_elements
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
-        element_data = next((el for el in self.elements_cache if el["index"] == index), None)
-        if element_data is None:
+        element = self.elements.get(index)
+        if element is None:
             return {"status": "error", "message": f"Element with index {index} not found. Call get_screen_elements first."}
 
-        bounds_str = element_data.get("bounds", "")
-        center_x, center_y = self._get_element_center(bounds_str)
-        
-        if center_x is None:
-            return {"status": "error", "message": f"Invalid bounds for element {index}"}
-
-        return self.tap_coordinates(center_x, center_y, element_info=element_data)
+        return self.tap_coordinates(element.center_x, element.center_y, element_info=element, settle=settle)
     
-    def tap_coordinates(self, x: int, y: int, element_info=None):
+    def tap_coordinates(self, x: int, y: int, element_info=None, settle: bool = None, snap: bool = None):
         """
         Tap at specific screen coordinates.
         
         Args:
             x: X coordinate
             y: Y coordinate
-            element_info: Optional element info for logging
+            element_info: Optional ElementRecord for logging
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
+            snap: Resolve the element under the point and move near misses onto its center.
+                None uses a fresh snapshot if there is one (EnvironmentConfig.SNAP_TAPS);
+                True re-reads the screen when needed; False taps the raw point.
         """
+        snapped_from = None
+        if element_info is None and snap is not False and (snap or EnvironmentConfig.SNAP_TAPS):
+            element_info = self.element_at(x, y, refresh=bool(snap))
+            if element_info is not None and not element_info.contains(x, y):
+                snapped_from = {"x": x, "y": y}
+                x, y = element_info.center_x, element_info.center_y
+
         try:
-            actions = self._create_action_builder()
-            actions.pointer_action.move_to_location(x, y)
-            actions.pointer_action.pointer_down()
-            actions.pointer_action.pause(0.1)
-            actions.pointer_action.pointer_up()
-            actions.perform()
+            if self.adb_input:
+                self.adb_input.tap(x, y)
+            else:
+                actions = self._create_action_builder()
+                actions.pointer_action.move_to_location(x, y)
+                actions.pointer_action.pointer_down()
+                actions.pointer_action.pause(0.1)
+                actions.pointer_action.pointer_up()
+                actions.perform()
             
             result = {
                 "status": "success",
                 "action": "tap",
                 "coordinates": {"x": x, "y": y}
             }
+            if snapped_from:
+                result["snapped_from"] = snapped_from
             if element_info:
-                result["element_text"] = element_info.get("text", "")
-                result["element_index"] = element_info.get("index")
-            return result
+                result["element_text"] = element_info.text or element_info.content_desc
+                result["element_index"] = element_info.index
+            return self._settle_after(result, settle)
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
-    def double_tap(self, index: int = None, x: int = None, y: int = None):
+    def double_tap(self, index: int = None, x: int = None, y: int = None, settle: bool = None):
         """
         Double tap on an element or coordinates.
         
         Args:
             index: Element index (optional)
             x, y: Coordinates (used if index not provided)
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
         if index is not None:
-            element_data = next((el for el in self.elements_cache if el["index"] == index), None)
-            if element_data is None:
+            element = self.elements.get(index)
+            if element is None:
                 return {"status": "error", "message": f"Element with index {index} not found"}
-            bounds_str = element_data.get("bounds", "")
-            x, y = self._get_element_center(bounds_str)
+            x, y = element.center_x, element.center_y
             
         if x is None or y is None:
             return {"status": "error", "message": "Either index or x/y coordinates required"}
         
         try:
+            # Always W3C actions: two separate `input tap` calls are too far apart to register as a double tap
             actions = self._create_action_builder()
             # First tap
             actions.pointer_action.move_to_location(x, y)
@@ -284,11 +535,12 @@ class Android:
             actions.pointer_action.pointer_up()
             actions.perform()
             
-            return {"status": "success", "action": "double_tap", "coordinates": {"x": x, "y": y}}
+            result = {"status": "success", "action": "double_tap", "coordinates": {"x": x, "y": y}}
+            return self._settle_after(result, settle)
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
-    def long_press(self, index: int = None, x: int = None, y: int = None, duration_ms: int = 1000):
+    def long_press(self, index: int = None, x: int = None, y: int = None, duration_ms: int = 1000, settle: bool = None):
         """
         Long press on an element or coordinates.
         
@@ -296,32 +548,119 @@ class Android:
             index: Element index (optional)
             x, y: Coordinates (used if index not provided)
             duration_ms: Press duration in milliseconds
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
         if index is not None:
-            element_data = next((el for el in self.elements_cache if el["index"] == index), None)
-            if element_data is None:
+            element = self.elements.get(index)
+            if element is None:
                 return {"status": "error", "message": f"Element with index {index} not found"}
-            bounds_str = element_data.get("bounds", "")
-            x, y = self._get_element_center(bounds_str)
+            x, y = element.center_x, element.center_y
             
         if x is None or y is None:
             return {"status": "error", "message": "Either index or x/y coordinates required"}
         
         try:
-            actions = self._create_action_builder()
-            actions.pointer_action.move_to_location(x, y)
-            actions.pointer_action.pointer_down()
-            actions.pointer_action.pause(duration_ms / 1000)
-            actions.pointer_action.pointer_up()
-            actions.perform()
+            if self.adb_input:
+                self.adb_input.long_press(x, y, duration_ms)
+            else:
+                actions = self._create_action_builder()
+                actions.pointer_action.move_to_location(x, y)
+                actions.pointer_action.pointer_down()
+                actions.pointer_action.pause(duration_ms / 1000)
+                actions.pointer_action.pointer_up()
+                actions.perform()
             
-            return {"status": "success", "action": "long_press", "coordinates": {"x": x, "y": y}, "duration_ms": duration_ms}
+            result = {"status": "success", "action": "long_press", "coordinates": {"x": x, "y": y}, "duration_ms": duration_ms}
+            return self._settle_after(result, settle)
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     # ==================== TEXT INPUT FUNCTIONS ====================
     
-    def type_text(self, text: str, target_index: int = None, clear_first: bool = True, submit: bool = False):
+    def _type_text_fast(self, text: str, target_index: int = None, clear_first: bool = True, submit: bool = False):
+        """
+        Type into a field resolved from the cached snapshot with a single shell command
+        (tap, clear, text, enter). Long or non-ASCII text goes through the clipboard,
+        which costs one extra call and is restored afterwards.
+        
+        Returns None when the snapshot can't identify the field or the server
+        refuses shell commands, i.e. whenever nothing was typed and the driver
+        path can take over. Once the command has run, failures are reported
+        instead, since retrying could type the text twice.
+        
+        A stale snapshot (an action ran since it was taken) is refreshed first,
+        with indexes carried over, so the tap doesn't land where the field used to be.
+        """
+        if self._snapshot_stale or self._snapshot_key is None:
+            filters, include_all = self._snapshot_args
+            snapshot = self.get_screen_elements(filters, include_all, since_last=True)
+            if snapshot["status"] != "success":
+                return None
+        
+        if target_index is not None:
+            field = self.elements.get(target_index)
+            if field is None or not field.is_text_field:
+                return None  # Only the device knows what gains focus after tapping a non-field
+        else:
+            field = self.elements.text_field()
+            if field is None:
+                return None
+        
+        commands = []
+        if target_index is not None or not field.focused:
+            commands.append(f"input tap {field.center_x} {field.center_y}")
+            if EnvironmentConfig.FOCUS_DELAY > 0:
+                # Let focus move and the IME attach before the keys arrive
+                commands.append(f"sleep {EnvironmentConfig.FOCUS_DELAY:g}")
+        if clear_first and field.text:
+            commands.append(f"input keyevent {KEYCODE_MOVE_END} " + " ".join([str(KEY_CODES['delete'])] * len(field.text)))
+        clipboard = None
+        if text.isascii() and len(text) <= EnvironmentConfig.MAX_INPUT_TEXT_LENGTH:
+            if text:
+                # `input text` reads %s as a space
+                commands.append("input text " + shlex.quote(text.replace(" ", "%s")))
+        else:
+            try:
+                clipboard = self.driver.get_clipboard_text()
+            except Exception:
+                pass  # Nothing to restore
+            self.driver.set_clipboard_text(text)
+            commands.append(f"input keyevent {KEYCODE_PASTE}")
+        if submit:
+            commands.append(f"input keyevent {KEY_CODES['enter']}")
+        
+        try:
+            output = self._shell_script("; ".join(commands))
+        except Exception as e:
+            if self.adb_input is None and "adb_shell" in str(e):
+                # Refused before anything ran; don't try the shell again this session
+                self._shell_unavailable = True
+                return None
+            self._snapshot_stale = True  # Some of the input may have gone through
+            return {"status": "error", "message": f"Fast text input failed: {e}"}
+        finally:
+            if clipboard is not None:
+                try:
+                    self.driver.set_clipboard_text(clipboard)
+                except Exception:
+                    pass
+        if "Error" in output or "Exception" in output:
+            self._snapshot_stale = True
+            return {"status": "error", "message": f"Fast text input failed: {output.strip()}"}
+        
+        result = {
+            "status": "success",
+            "action": "type_text",
+            "previous_text": field.text,
+            "new_text": text,
+            "element_index": field.index
+        }
+        if submit:
+            result["submitted"] = True
+        return result
+    
+    def type_text(self, text: str, target_index: int = None, clear_first: bool = True, submit: bool = False,
+                  fast: bool = None, settle: bool = None):
         """
         Type text into a text field.
         
@@ -330,19 +669,28 @@ class Android:
             target_index: Index of specific text field (optional)
             clear_first: Whether to clear existing text first
             submit: Whether to press Enter after typing
+            fast: Resolve the field from the last snapshot and inject the text in one
+                shell command (default: EnvironmentConfig.FAST_TEXT_INPUT). Falls back
+                to the element lookup path when the snapshot can't identify the field.
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
+        if (EnvironmentConfig.FAST_TEXT_INPUT if fast is None else fast) and self.has_shell:
+            try:
+                result = self._type_text_fast(text, target_index, clear_first, submit)
+            except Exception:
+                result = None  # Failed before the shell command ran, use the driver path below
+            if result is not None:
+                return self._settle_after(result, settle)
+        
         try:
             edit_box = None
             
             # If target_index provided, tap on that element first
             if target_index is not None:
-                element_data = next((el for el in self.elements_cache if el["index"] == target_index), None)
-                if element_data:
-                    bounds_str = element_data.get("bounds", "")
-                    x, y = self._get_element_center(bounds_str)
-                    if x and y:
-                        self.tap_coordinates(x, y)
-                        time.sleep(0.3)  # Wait for focus
+                element = self.elements.get(target_index)
+                if element:
+                    self.tap_coordinates(element.center_x, element.center_y, settle=False)
+                    self.wait_for_settle(timeout=EnvironmentConfig.FOCUS_TIMEOUT)  # Wait for focus
             
             # Find text fields
             textboxes = self.driver.find_elements(AppiumBy.CLASS_NAME, "android.widget.EditText")
@@ -376,17 +724,19 @@ class Android:
             }
             
             if submit:
-                self.press_key("enter")
+                self.press_key("enter", settle=False)
                 result["submitted"] = True
                 
-            return result
+            return self._settle_after(result, settle)
             
         except Exception as e:
+            self._snapshot_stale = True  # Some of the input may have gone through
             return {"status": "error", "message": str(e)}
 
     # ==================== SCROLL & SWIPE FUNCTIONS ====================
     
-    def scroll(self, direction: str, amount: str = "medium", start_x: int = None, start_y: int = None):
+    def scroll(self, direction: str, amount: str = "medium", start_x: int = None, start_y: int = None,
+               settle: bool = None):
         """
         Scroll the screen in a direction with configurable amount.
         
@@ -394,6 +744,7 @@ class Android:
             direction: 'up', 'down', 'left', 'right'
             amount: 'small', 'medium', 'large', 'full_page'
             start_x, start_y: Optional starting point for the scroll
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
         scroll_percent = SCROLL_AMOUNTS.get(amount, 0.5)
         
@@ -429,9 +780,10 @@ class Android:
         else:
             return {"status": "error", "message": f"Invalid direction: {direction}"}
         
-        return self.swipe(start_x, start_y, end_x, end_y)
+        return self.swipe(start_x, start_y, end_x, end_y, settle=settle)
     
-    def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int = 500):
+    def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int = 500,
+              settle: bool = None):
         """
         Perform a swipe gesture from one point to another.
         
@@ -439,81 +791,140 @@ class Android:
             start_x, start_y: Starting coordinates
             end_x, end_y: Ending coordinates
             duration_ms: Duration of swipe in milliseconds
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
         try:
-            actions = self._create_action_builder()
-            actions.pointer_action.move_to_location(start_x, start_y)
-            actions.pointer_action.pointer_down()
-            actions.pointer_action.pause(duration_ms / 1000)
-            actions.pointer_action.move_to_location(end_x, end_y)
-            actions.pointer_action.pointer_up()
-            actions.perform()
+            if self.adb_input:
+                self.adb_input.swipe(start_x, start_y, end_x, end_y, duration_ms)
+            else:
+                actions = self._create_action_builder()
+                actions.pointer_action.move_to_location(start_x, start_y)
+                actions.pointer_action.pointer_down()
+                actions.pointer_action.pause(duration_ms / 1000)
+                actions.pointer_action.move_to_location(end_x, end_y)
+                actions.pointer_action.pointer_up()
+                actions.perform()
             
-            return {
+            result = {
                 "status": "success",
                 "action": "swipe",
                 "start": {"x": start_x, "y": start_y},
                 "end": {"x": end_x, "y": end_y},
                 "duration_ms": duration_ms
             }
+            return self._settle_after(result, settle)
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     # ==================== KEY & NAVIGATION FUNCTIONS ====================
     
-    def press_key(self, key: str):
+    def press_key(self, key: str, settle: bool = None):
         """
         Press a system key.
         
         Args:
             key: Key name ('enter', 'back', 'home', etc.)
+            settle: Wait for the UI to settle afterwards (default: auto_settle)
         """
         key_code = KEY_CODES.get(key.lower())
         if key_code is None:
             return {"status": "error", "message": f"Unknown key: {key}. Valid keys: {list(KEY_CODES.keys())}"}
         
         try:
-            self.driver.press_keycode(key_code)
-            return {"status": "success", "action": "press_key", "key": key}
+            if self.adb_input:
+                self.adb_input.press_keycode(key_code)
+            else:
+                self.driver.press_keycode(key_code)
+            return self._settle_after({"status": "success", "action": "press_key", "key": key}, settle)
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     # ==================== APP FUNCTIONS ====================
     
-    def open_app(self, app: str):
+    def open_app(self, app: str, settle: bool = True):
         """
         Open an application by package name or common name.
         
         Args:
-            app: Package name or common app name
+            app: Package name, common app name, or any installed app's name
+            settle: Wait for the app's UI to settle before returning
         """
-        # Check if it's a common name
-        package = APP_PACKAGES.get(app.lower(), app)
+        # Check if it's a common name, otherwise match it against the installed apps
+        package = APP_PACKAGES.get(app.lower())
+        resolved = False
+        if package is None:
+            package = app
+            if " " in app or "." not in app:
+                try:
+                    match = self.apps.resolve(app)
+                    if match is None:
+                        candidates = self.apps.find(app)
+                        if candidates:
+                            return {
+                                "status": "error",
+                                "message": f"'{app}' doesn't clearly match one installed app; "
+                                           "open one of the candidates by package name",
+                                "candidates": candidates
+                            }
+                    else:
+                        package = match
+                        resolved = package != app
+                except Exception:
+                    pass
         
         try:
+            before = None
+            if settle:
+                try:
+                    before = fingerprint_page_source(self.driver.page_source)
+                except Exception:
+                    pass
             self.driver.activate_app(package)
             self.current_app = package
-            time.sleep(1)  # Wait for app to open
-            return {"status": "success", "action": "open_app", "package": package}
+            result = {"status": "success", "action": "open_app", "package": package}
+            if resolved:
+                result["resolved_from"] = app
+            if settle:
+                result["foreground"] = self._wait_for_package(package)
+            return self._settle_after(result, settle, before=before)
         except Exception as e:
+            # The package may have been removed since the inventory was built
+            self.apps.invalidate()
             return {"status": "error", "message": f"Failed to open {app}: {str(e)}"}
     
-    def get_installed_apps(self, include_system: bool = False):
+    def _wait_for_package(self, package: str, timeout: float = None) -> bool:
+        """Poll until `package` is in the foreground; False if it isn't by the timeout."""
+        timeout = EnvironmentConfig.APP_LAUNCH_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        interval = EnvironmentConfig.SETTLE_POLL_INTERVAL
+        while True:
+            try:
+                if self.driver.current_package == package:
+                    return True
+            except Exception:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, EnvironmentConfig.SETTLE_MAX_POLL_INTERVAL)
+    
+    def get_installed_apps(self, include_system: bool = False, refresh: bool = False):
         """
-        Get list of installed applications.
+        Get list of installed applications (from the cached app inventory).
         
         Args:
             include_system: Include system apps if True
+            refresh: Re-read the package list from the device first
         """
         try:
+            if refresh:
+                self.apps.invalidate()
+            self.apps.ensure_fresh()
             if include_system:
-                output = self.driver.execute_script("mobile: shell",
-                    {"command": "pm", "args": ["list", "packages"]}).splitlines()
+                packages = list(self.apps.packages)
             else:
-                output = self.driver.execute_script("mobile: shell",
-                    {"command": "pm", "args": ["list", "packages", "-3"]}).splitlines()
-                    
-            packages = [pkg.replace("package:", "") for pkg in output]
+                packages = sorted(self.apps.third_party)
             
             # Add common system apps that users often want
             if not include_system:
@@ -528,6 +939,52 @@ class Android:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def find_app(self, query: str, limit: int = 5):
+        """
+        Find installed apps matching a name, without listing every package.
+        
+        Args:
+            query: App name to look for
+            limit: Maximum number of matches
+        """
+        try:
+            return {"status": "success", "query": query, "matches": self.apps.find(query, limit=limit)}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def install_app(self, apk_path: str):
+        """
+        Install an APK from the host and drop the cached app inventory.
+        
+        Args:
+            apk_path: Path to the .apk file
+        """
+        try:
+            self.driver.install_app(apk_path)
+            return {"status": "success", "action": "install_app", "apk": apk_path}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        finally:
+            self.apps.invalidate()
+
+    def remove_app(self, app: str):
+        """
+        Uninstall an app and drop the cached app inventory.
+        
+        Args:
+            app: Package name or common app name
+        """
+        package = APP_PACKAGES.get(app.lower(), app)
+        try:
+            removed = self.driver.remove_app(package)
+            if removed is False:
+                return {"status": "error", "message": f"Failed to remove {package}"}
+            return {"status": "success", "action": "remove_app", "package": package}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        finally:
+            self.apps.invalidate()
+
     # ==================== UTILITY FUNCTIONS ====================
     
     def wait(self, seconds: float = 1.0, reason: str = None):
@@ -544,12 +1001,37 @@ class Android:
             result["reason"] = reason
         return result
     
-    def screenshot(self):
-        """Take a screenshot and return as PNG bytes."""
-        return self.driver.get_screenshot_as_png()
+    def screenshot_image(self):
+        """
+        Take a screenshot as a PIL Image.
+        
+        With the adb backend the raw framebuffer is wrapped without copying or
+        any PNG decode; otherwise the driver's PNG is decoded.
+        """
+        if Image is None:
+            raise RuntimeError("Pillow is required for screenshot images. Install with: pip install Pillow")
+        if self.screenshot_backend == "adb":
+            width, height, mode, raw_mode, pixels = capture_framebuffer(self.udid)
+            return Image.frombuffer(mode, (width, height), pixels, "raw", raw_mode, 0, 1)
+        return Image.open(BytesIO(self.driver.get_screenshot_as_png()))
+    
+    def screenshot(self, image_format: str = "png", quality: int = None):
+        """
+        Take a screenshot and return it as encoded image bytes.
+        
+        Args:
+            image_format: 'png' (default), 'jpeg' or 'webp'
+            quality: Lossy quality for JPEG/WebP
+        """
+        if self.screenshot_backend != "adb" and image_format.lower() == "png":
+            # The driver already hands us a PNG, no need to re-encode
+            return self.driver.get_screenshot_as_png()
+        return encode_image(self.screenshot_image(), image_format, quality)
 
     def end_driver(self):
         """Clean up and quit the driver."""
+        if self.adb_input:
+            self.adb_input.close()
         self.driver.quit()
 
     # ==================== LEGACY COMPATIBILITY ====================
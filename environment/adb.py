@@ -0,0 +1,184 @@
+"""
+Direct ADB access for the Android environment.
+Keeps a persistent `adb shell` open so gestures skip the Appium/UiAutomator2 HTTP hops.
+"""
+
+import itertools
+import os
+import shutil
+import struct
+import subprocess
+import threading
+
+# Seconds a single shell command may take before the shell is killed
+ADB_COMMAND_TIMEOUT = 15.0
+
+# screencap pixel formats -> (PIL mode, PIL raw mode)
+SCREENCAP_FORMATS = {
+    1: ("RGBA", "RGBA"),  # RGBA_8888
+    2: ("RGB", "RGBX"),   # RGBX_8888
+    5: ("RGBA", "BGRA"),  # BGRA_8888
+}
+
+
+def adb_path() -> str:
+    """Locate the adb binary (ANDROID_HOME platform-tools first, then PATH)."""
+    sdk = os.environ.get("ANDROID_HOME")
+    if sdk:
+        candidate = os.path.join(sdk, "platform-tools", "adb.exe" if os.name == "nt" else "adb")
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which("adb") or "adb"
+
+
+def adb_command(serial: str = None, *args) -> list:
+    """Build an adb argv, targeting a specific device when a serial is given."""
+    command = [adb_path()]
+    if serial:
+        command += ["-s", serial]
+    return command + list(args)
+
+
+def capture_framebuffer(serial: str = None, timeout: float = ADB_COMMAND_TIMEOUT):
+    """
+    Grab the raw framebuffer with `adb exec-out screencap` (no -p, so the device
+    never encodes a PNG).
+
+    Returns (width, height, mode, raw_mode, pixels); pixels is a memoryview over
+    the pixel data that follows the screencap header, ready for Image.frombuffer.
+    """
+    data = subprocess.run(
+        adb_command(serial, "exec-out", "screencap"),
+        capture_output=True, timeout=timeout, check=True
+    ).stdout
+    return parse_framebuffer(data)
+
+
+def parse_framebuffer(data: bytes):
+    """Split raw screencap output into (width, height, mode, raw_mode, pixels); see capture_framebuffer."""
+    if len(data) < 12:
+        raise RuntimeError("screencap returned no data")
+
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    if pixel_format not in SCREENCAP_FORMATS:
+        raise RuntimeError(f"Unsupported screencap pixel format: {pixel_format}")
+    # The header is 12 bytes, or 16 with the color space field (Android 9+)
+    header_size = len(data) - width * height * 4
+    if header_size not in (12, 16):
+        raise RuntimeError(f"Unexpected screencap size {len(data)} for {width}x{height}")
+
+    mode, raw_mode = SCREENCAP_FORMATS[pixel_format]
+    return width, height, mode, raw_mode, memoryview(data)[header_size:]
+
+
+def discover_devices(timeout: float = ADB_COMMAND_TIMEOUT) -> list:
+    """Serials of the devices/emulators adb reports as ready ("device" state)."""
+    output = subprocess.run(
+        adb_command(None, "devices"),
+        capture_output=True, text=True, timeout=timeout, check=True
+    ).stdout
+    devices = []
+    for line in output.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] == "device":
+            devices.append(parts[0])
+    return devices
+
+
+class AdbShell:
+    """
+    A long-lived `adb shell` process that runs commands one at a time.
+
+    Each command is followed by an echoed marker so the caller knows when it
+    finished and gets its output back; a watchdog kills the shell if a command
+    hangs, and the next call starts a fresh one.
+    """
+
+    def __init__(self, serial: str = None, timeout: float = ADB_COMMAND_TIMEOUT):
+        self.serial = serial
+        self.timeout = timeout
+        self._process = None
+        self._lock = threading.Lock()
+        self._markers = itertools.count()
+
+    def _ensure_started(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                adb_command(self.serial, "shell"),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+        return self._process
+
+    def run(self, command: str) -> str:
+        """Run a shell command on the device and return its combined output."""
+        with self._lock:
+            process = self._ensure_started()
+            marker = f"__amadeus_done_{next(self._markers)}__"
+            watchdog = threading.Timer(self.timeout, process.kill)
+            watchdog.start()
+            try:
+                process.stdin.write(f"{command}; echo {marker}\n")
+                process.stdin.flush()
+                lines = []
+                for line in process.stdout:
+                    # Output without a trailing newline puts the marker at the end of its last line
+                    stripped = line.rstrip("\r\n")
+                    if stripped.endswith(marker):
+                        lines.append(stripped[:-len(marker)])
+                        return "".join(lines)
+                    lines.append(line)
+            except OSError as e:
+                raise RuntimeError(f"adb shell failed: {e}") from e
+            finally:
+                watchdog.cancel()
+            raise RuntimeError(f"adb shell exited while running: {command}")
+
+    def close(self):
+        """Terminate the shell process."""
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                try:
+                    self._process.stdin.close()
+                    self._process.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._process.kill()
+            self._process = None
+
+
+class AdbInputBackend:
+    """
+    Gesture and key injection through the device's `input` command.
+
+    Used by Android in place of Selenium W3C actions; Appium stays in charge of
+    hierarchy queries and everything else.
+    """
+
+    def __init__(self, serial: str = None):
+        self.shell = AdbShell(serial)
+
+    def _input(self, *args):
+        output = self.shell.run("input " + " ".join(str(arg) for arg in args))
+        if "Error" in output or "Exception" in output:
+            raise RuntimeError(output.strip())
+
+    def tap(self, x: int, y: int):
+        self._input("tap", int(x), int(y))
+
+    def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int = 500):
+        self._input("swipe", int(start_x), int(start_y), int(end_x), int(end_y), int(duration_ms))
+
+    def long_press(self, x: int, y: int, duration_ms: int = 1000):
+        # A swipe that doesn't move is a long press
+        self._input("swipe", int(x), int(y), int(x), int(y), int(duration_ms))
+
+    def press_keycode(self, key_code: int):
+        self._input("keyevent", int(key_code))
+
+    def close(self):
+        self.shell.close()
@@ -0,0 +1,144 @@
+"""
+Installed-app inventory for the Android environment.
+Caches the package list per device and resolves app names to packages locally.
+"""
+
+import re
+import time
+from difflib import SequenceMatcher
+
+# Package name segments that say nothing about the app itself
+GENERIC_SEGMENTS = {"com", "org", "net", "android", "google", "apps", "app", "mobile", "www"}
+
+# Minimum score for open_app to trust a fuzzy match without asking
+MIN_RESOLVE_SCORE = 0.75
+# ...and how far it must lead the runner-up; closer matches are returned as candidates
+MIN_RESOLVE_MARGIN = 0.05
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def package_label(package: str) -> str:
+    """Best-effort readable name from a package (com.spotify.music -> 'spotify')."""
+    segments = [seg for seg in package.lower().split('.') if seg not in GENERIC_SEGMENTS]
+    return segments[0] if segments else package.split('.')[-1]
+
+
+def _match_score(query: str, key: str) -> float:
+    if query == key:
+        return 1.0
+    score = SequenceMatcher(None, query, key).ratio()
+    coverage = len(query) / len(key)
+    # Substrings only count when they cover most of the name or start it ("you" -> youtube),
+    # so a stray letter or two inside a long package name is not a confident match
+    if query in key and (coverage >= 0.5 or (len(query) >= 3 and key.startswith(query))):
+        score = max(score, 0.8 + 0.2 * coverage)
+    return score
+
+
+class AppInventory:
+    """
+    Per-device cache of installed packages with a fuzzy name -> package index.
+
+    The shell has no API for launcher labels, so each package is indexed under a
+    label derived from its name, its individual name segments and any known
+    aliases (e.g. "play store" -> com.android.vending). The cache expires after
+    `ttl` seconds and is dropped explicitly with invalidate().
+    """
+
+    def __init__(self, shell, aliases: dict = None, ttl: float = 600.0):
+        """
+        Args:
+            shell: callable(command, args) -> str running a command on the device
+            aliases: Common name -> package mappings
+            ttl: Seconds before the package list is re-read
+        """
+        self.shell = shell
+        self.aliases = aliases or {}
+        self.ttl = ttl
+        self.packages = []
+        self.third_party = set()
+        self.launchable = set()
+        self.labels = {}
+        self._keys = {}
+        self._built_at = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+
+    def invalidate(self):
+        """Forget the cached inventory (e.g. after a package install or removal)."""
+        self._built_at = None
+
+    def refresh(self):
+        """Re-read the package lists (all, third-party, launchable) from the device."""
+        output = self.shell("pm", ["list", "packages"])
+        self.packages = sorted(line.replace("package:", "").strip() for line in output.splitlines() if line.strip())
+        output = self.shell("pm", ["list", "packages", "-3"])
+        self.third_party = {line.replace("package:", "").strip() for line in output.splitlines() if line.strip()}
+
+        try:
+            output = self.shell("cmd", ["package", "query-activities", "--brief",
+                                        "-a", "android.intent.action.MAIN",
+                                        "-c", "android.intent.category.LAUNCHER"])
+            self.launchable = {line.strip().split('/')[0] for line in output.splitlines() if '/' in line}
+        except Exception:
+            # Older Android versions lack query-activities; treat nothing as launchable
+            self.launchable = set()
+
+        alias_names = {}
+        for name, package in self.aliases.items():
+            alias_names.setdefault(package, []).append(name)
+
+        self.labels = {}
+        self._keys = {}
+        for package in self.packages:
+            names = alias_names.get(package, [])
+            self.labels[package] = names[0] if names else package_label(package)
+            keys = {_normalize(self.labels[package]), _normalize(package)}
+            keys.update(_normalize(seg) for seg in package.split('.') if seg not in GENERIC_SEGMENTS)
+            keys.update(_normalize(name) for name in names)
+            self._keys[package] = {key for key in keys if key}
+        self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self.is_stale:
+            self.refresh()
+
+    def is_installed(self, package: str) -> bool:
+        self.ensure_fresh()
+        return package in self.labels
+
+    def find(self, query: str, limit: int = 5) -> list:
+        """Top matches for an app name as [{"package", "label", "score"}], best first."""
+        self.ensure_fresh()
+        # "google maps" should match as well as "maps"
+        specific = [word for word in query.lower().split() if word not in GENERIC_SEGMENTS]
+        queries = {_normalize(query), _normalize(" ".join(specific))} - {""}
+        if not queries:
+            return []
+
+        scored = []
+        for package, keys in self._keys.items():
+            score = max(_match_score(q, key) for q in queries for key in keys)
+            if package in self.launchable:
+                score = min(1.0, score + 0.05)  # Prefer apps the user can actually open
+            scored.append((score, package))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        return [
+            {"package": package, "label": self.labels[package], "score": round(score, 3)}
+            for score, package in scored[:limit]
+        ]
+
+    def resolve(self, query: str):
+        """Package for an app name if the best match is confident and clearly ahead of the next, else None."""
+        matches = self.find(query, limit=2)
+        if not matches or matches[0]["score"] < MIN_RESOLVE_SCORE:
+            return None
+        if len(matches) > 1 and matches[0]["score"] - matches[1]["score"] < MIN_RESOLVE_MARGIN:
+            return None
+        return matches[0]["package"]
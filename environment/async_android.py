@@ -0,0 +1,74 @@
+"""
+Asyncio facade for the Android environment.
+Lets one event loop drive several devices and overlap device I/O with LLM calls.
+"""
+
+import asyncio
+import functools
+
+from environment.Android import Android
+
+# Android methods exposed as coroutines
+ASYNC_METHODS = frozenset({
+    "get_screen_elements", "get_device_info", "wait_for_settle", "settle_pending",
+    "query_elements", "locate_text", "tap", "tap_coordinates", "double_tap", "long_press",
+    "type_text", "scroll", "swipe", "press_key",
+    "open_app", "get_installed_apps", "find_app", "install_app", "remove_app",
+    "wait", "screenshot", "screenshot_image", "end_driver",
+})
+
+
+class AsyncAndroid:
+    """
+    Awaitable counterpart of Android.
+
+    Every method in ASYNC_METHODS is available as a coroutine taking the same
+    arguments plus an optional `call_timeout` (seconds). Blocking driver calls
+    run on a shared executor, so sessions don't need a thread each; calls to
+    the same device are serialized.
+
+    Cancelling (or timing out) an awaiting task returns control immediately, but
+    the underlying driver call cannot be interrupted: the device stays locked
+    until it actually finishes, so the next call never overlaps it.
+    """
+
+    def __init__(self, android: Android, executor=None, timeout: float = None):
+        """
+        Args:
+            android: Session to wrap
+            executor: concurrent.futures executor for blocking calls (default: the loop's)
+            timeout: Default per-call timeout in seconds (None = no timeout)
+        """
+        self.android = android
+        self.executor = executor
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def create(cls, executor=None, timeout: float = None, **android_kwargs):
+        """Open a new Android session without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        android = await loop.run_in_executor(executor, functools.partial(Android, **android_kwargs))
+        return cls(android, executor=executor, timeout=timeout)
+
+    async def call(self, method: str, *args, call_timeout: float = None, **kwargs):
+        """Run an Android method on the executor and await its result."""
+        loop = asyncio.get_running_loop()
+        await self._lock.acquire()
+        try:
+            future = loop.run_in_executor(self.executor, functools.partial(getattr(self.android, method), *args, **kwargs))
+        except BaseException:
+            self._lock.release()
+            raise
+        # Unlock when the blocking call is really done, not when the awaiting task gives up
+        future.add_done_callback(lambda _: self._lock.release())
+        timeout = self.timeout if call_timeout is None else call_timeout
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def __getattr__(self, name):
+        if name == "android":
+            raise AttributeError(name)
+        if name in ASYNC_METHODS:
+            return functools.partial(self.call, name)
+        # Plain attributes (screen_width, elements, ...) come straight from the session
+        return getattr(self.android, name)
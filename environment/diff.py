@@ -0,0 +1,99 @@
+"""
+Element diffs between consecutive screen snapshots.
+Elements are matched by what they are (class, resource-id, text, position)
+rather than by their index in the list.
+"""
+
+# Element fields (record attributes and dict keys alike) reported for changed elements
+DIFF_FIELDS = ("text", "content_desc", "bounds", "clickable", "checked")
+
+# Max center distance (px) for pairing an element whose text changed with its previous self
+NEIGHBORHOOD_RADIUS = 64
+
+
+def identity(record) -> tuple:
+    """What an element is, independent of where it is."""
+    return record.class_name, record.resource_id, record.text, record.content_desc
+
+
+def fingerprint(record) -> tuple:
+    """Everything the agent sees about an element except its index."""
+    return identity(record) + (record.left, record.top, record.right, record.bottom, record.clickable, record.checked)
+
+
+def _distance(a, b) -> float:
+    return ((a.center_x - b.center_x) ** 2 + (a.center_y - b.center_y) ** 2) ** 0.5
+
+
+def _pair(old, new, key, max_distance=None) -> list:
+    """
+    Pair up old and new records with equal keys, closest centers first.
+
+    Matched records are removed from both lists; returns [(old, new)].
+    """
+    groups = {}
+    for record in old:
+        groups.setdefault(key(record), []).append(record)
+
+    candidates = []
+    for record in new:
+        for previous in groups.get(key(record), ()):
+            distance = _distance(previous, record)
+            if max_distance is None or distance <= max_distance:
+                candidates.append((distance, id(previous), id(record), previous, record))
+    candidates.sort(key=lambda item: item[:3])
+
+    pairs = []
+    used = set()
+    for _, old_id, new_id, previous, record in candidates:
+        if old_id not in used and new_id not in used:
+            used.update((old_id, new_id))
+            pairs.append((previous, record))
+    old[:] = [record for record in old if id(record) not in used]
+    new[:] = [record for record in new if id(record) not in used]
+    return pairs
+
+
+def diff_records(old_records, new_records, radius: int = NEIGHBORHOOD_RADIUS) -> dict:
+    """
+    Match the records of two snapshots.
+
+    Records are paired in three passes: identical fingerprints (unchanged),
+    same identity anywhere on screen (moved or state changed), then same class
+    and resource-id within `radius` pixels (text changed). The rest are added
+    or removed.
+
+    Returns:
+        {"unchanged": [(old, new)], "changed": [(old, new)], "added": [new], "removed": [old]}
+    """
+    old = list(old_records)
+    new = list(new_records)
+    unchanged = _pair(old, new, fingerprint)
+    changed = _pair(old, new, identity)
+    changed += _pair(old, new, lambda record: (record.class_name, record.resource_id), radius)
+    return {"unchanged": unchanged, "changed": changed, "added": new, "removed": old}
+
+
+def carry_over_indexes(diff: dict, next_index: int) -> int:
+    """
+    Give matched records their previous index and added ones fresh indexes.
+
+    Indexes the agent already knows stay valid across snapshots. Returns the
+    next unused index.
+    """
+    for previous, record in diff["unchanged"] + diff["changed"]:
+        record.index = previous.index
+    for record in diff["added"]:
+        record.index = next_index
+        next_index += 1
+    return next_index
+
+
+def describe_change(previous, record) -> dict:
+    """New element dict plus a "was" dict of the fields that changed."""
+    info = record.to_dict()
+    info["was"] = {
+        field: getattr(previous, field) for field in DIFF_FIELDS
+        if getattr(previous, field) != getattr(record, field)
+    }
+    return info
@@ -0,0 +1,134 @@
+"""
+Element list encodings for the agent.
+"json" is the list of element dicts; "compact" is a tab-separated table with
+class and resource-id dictionaries, which costs far fewer prompt tokens.
+"""
+
+import json
+import re
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+_encoding = None  # tiktoken encoding, loaded on first use
+
+ELEMENT_FORMATS = ("json", "compact")
+
+# Columns of the compact table: index, class id, resource-id id, bounds, clickable, text, content description
+COMPACT_COLUMNS = ("i", "cls", "id", "l", "t", "r", "b", "click", "text", "desc")
+
+# Explanation for system prompts of agents using the compact format
+COMPACT_FORMAT_HELP = (
+    "Screen elements come as a compact table: a `classes` line and an `ids` line map numbers to class "
+    "names and resource-ids, then a header row and one tab-separated row per element with index (i), "
+    "class number (cls), resource-id number (id), bounds as left/top/right/bottom pixels (l t r b), "
+    "click=1 if clickable, text and content description (desc), and where present checked=1 for checked "
+    "checkboxes/switches and vis for the visible fraction of partly hidden elements. Empty cells mean no "
+    "value; desc is also left empty when it repeats the text."
+)
+
+_CELL_WHITESPACE_RE = re.compile(r'[\t\r\n]+')
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]|\s+')
+
+
+def _cell(value: str) -> str:
+    return _CELL_WHITESPACE_RE.sub(" ", value) if value else ""
+
+
+def encode_compact(records) -> str:
+    """Encode element records as a dictionary-compressed, tab-separated table."""
+    records = list(records)
+    classes = {}
+    resource_ids = {}
+    for record in records:
+        classes.setdefault(record.short_class, len(classes))
+        if record.resource_id:
+            resource_ids.setdefault(record.short_resource_id, len(resource_ids))
+
+    columns = list(COMPACT_COLUMNS)
+    with_checked = any(record.checked for record in records)
+    if with_checked:
+        columns.append("checked")
+    with_visibility = any(record.visibility < 1.0 for record in records)
+    if with_visibility:
+        columns.append("vis")
+
+    lines = [
+        "classes: " + " ".join(f"{number}={name}" for name, number in classes.items()),
+        "ids: " + " ".join(f"{number}={name}" for name, number in resource_ids.items()),
+        "\t".join(columns),
+    ]
+    for record in records:
+        row = [
+            str(record.index),
+            str(classes[record.short_class]),
+            str(resource_ids[record.short_resource_id]) if record.resource_id else "",
+            str(record.left), str(record.top), str(record.right), str(record.bottom),
+            "1" if record.clickable else "",
+            _cell(record.text),
+            _cell(record.content_desc) if record.content_desc != record.text else "",
+        ]
+        if with_checked:
+            row.append("1" if record.checked else "")
+        if with_visibility:
+            row.append(f"{record.visibility:.2f}" if record.visibility < 1.0 else "")
+        lines.append("\t".join(row))
+    return "\n".join(lines)
+
+
+def encode_elements(records, element_format: str = "json"):
+    """Element list in the requested format: list of dicts ("json") or table string ("compact")."""
+    if element_format == "compact":
+        return encode_compact(records)
+    if element_format == "json":
+        return [record.to_dict() for record in records]
+    raise ValueError(f"Unknown element format: {element_format}. Valid formats: {list(ELEMENT_FORMATS)}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Prompt tokens for a text.
+
+    Exact with tiktoken (cl100k_base) when installed; otherwise an estimate that
+    counts words (one token per four characters), punctuation and whitespace
+    other than single spaces, which merge into the following word.
+    """
+    global _encoding, TIKTOKEN_AVAILABLE
+    if TIKTOKEN_AVAILABLE and _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            TIKTOKEN_AVAILABLE = False  # Encoding files unavailable (e.g. offline)
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece[0].isspace():
+            tokens += piece != " "
+        else:
+            tokens += max(1, len(piece) // 4)
+    return tokens
+
+
+def measure_tokens(result: dict, records) -> dict:
+    """
+    Tokens of a get_screen_elements tool result in both formats.
+
+    `result` is the result as sent (elements in any format); its element list is
+    replaced with each encoding in turn and serialized the way tool results are.
+    """
+    sizes = {}
+    for element_format in ELEMENT_FORMATS:
+        encoded = dict(result, elements=encode_elements(records, element_format))
+        sizes[element_format] = estimate_tokens(json.dumps(encoded))
+    saved = sizes["json"] - sizes["compact"]
+    return {
+        "json_tokens": sizes["json"],
+        "compact_tokens": sizes["compact"],
+        "saved_tokens": saved,
+        "saved_pct": round(100.0 * saved / sizes["json"], 1) if sizes["json"] else 0.0,
+    }
@@ -0,0 +1,186 @@
+"""
+Compact element snapshot for the Android environment.
+Holds the elements of the last screen dump with pre-parsed bounds and O(1) lookups.
+"""
+
+import re
+from difflib import SequenceMatcher
+
+from environment.spatial import SpatialIndex
+
+# Minimum similarity for a fuzzy text match (1.0 = exact)
+MIN_TEXT_SCORE = 0.8
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def _text_score(query: str, label: str, partial: bool) -> float:
+    """Similarity of a normalized query and label: 1.0 exact, 0.9+ contained (partial), else fuzzy ratio."""
+    if query == label:
+        return 1.0
+    if partial and query in label:
+        return 0.9 + 0.1 * len(query) / len(label)
+    matcher = SequenceMatcher(None, query, label)
+    if matcher.real_quick_ratio() < MIN_TEXT_SCORE or matcher.quick_ratio() < MIN_TEXT_SCORE:
+        return 0.0
+    return matcher.ratio()
+
+
+def match_text(records, text: str, partial: bool = False, min_score: float = MIN_TEXT_SCORE) -> list:
+    """
+    Records whose text or content description matches `text`, best first, as [(score, record)].
+
+    Matching ignores case and repeated whitespace; partial also accepts labels
+    containing the text, and near misses (OCR-style typos, changed punctuation)
+    match fuzzily down to min_score. Ties go to the smallest element, which is
+    the label itself rather than a container repeating it.
+    """
+    query = _normalize_text(text)
+    if not query:
+        return []
+    scored = []
+    for record in records:
+        labels = {_normalize_text(label) for label in (record.text, record.content_desc) if label}
+        score = max((_text_score(query, label, partial) for label in labels), default=0.0)
+        if score >= min_score:
+            area = (record.right - record.left) * (record.bottom - record.top)
+            scored.append((score, area, record))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(score, record) for score, _, record in scored]
+
+
+class ElementRecord:
+    """
+    A single on-screen element with integer bounds and a precomputed center.
+
+    `parent` links to the record of the enclosing node; ancestors that are not
+    reported to the agent themselves have index None. `child_index` is the
+    node's position among its siblings. `visibility` is the visible fraction
+    set by the visibility pass (1.0 if it didn't run).
+    """
+
+    __slots__ = (
+        "index", "text", "class_name", "content_desc", "resource_id", "clickable", "focused", "checked",
+        "left", "top", "right", "bottom", "center_x", "center_y", "parent", "child_index", "visibility",
+    )
+
+    def __init__(self, index, text, class_name, content_desc, resource_id, clickable, left, top, right, bottom,
+                 focused=False, parent=None, child_index=0, checked=False):
+        self.index = index
+        self.text = text
+        self.class_name = class_name
+        self.content_desc = content_desc
+        self.resource_id = resource_id
+        self.clickable = clickable
+        self.focused = focused
+        self.checked = checked
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.center_x = (left + right) // 2
+        self.center_y = (top + bottom) // 2
+        self.parent = parent
+        self.child_index = child_index
+        self.visibility = 1.0
+
+    @property
+    def short_class(self) -> str:
+        return self.class_name.split('.')[-1] if self.class_name else ""
+
+    @property
+    def short_resource_id(self) -> str:
+        return self.resource_id.split('/')[-1] if self.resource_id else ""
+
+    @property
+    def is_text_field(self) -> bool:
+        return self.class_name.endswith("EditText")
+
+    @property
+    def bounds(self) -> str:
+        return f"[{self.left},{self.top}][{self.right},{self.bottom}]"
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def to_dict(self) -> dict:
+        """Element dict as returned to the agent (empty values dropped, except index)."""
+        info = {
+            "index": self.index,
+            "text": self.text,
+            "class": self.short_class,
+            "bounds": self.bounds,
+            "content_desc": self.content_desc,
+            "clickable": self.clickable,
+            "checked": self.checked,
+            "resource_id": self.short_resource_id,
+        }
+        info = {k: v for k, v in info.items() if v or k == "index"}
+        if self.visibility < 1.0:
+            info["visibility"] = round(self.visibility, 2)
+        return info
+
+    def __repr__(self):
+        return f"ElementRecord({self.to_dict()})"
+
+
+class ElementTable:
+    """
+    Indexed snapshot of screen elements.
+
+    Lookups by index, resource-id and text are dictionary hits instead of scans
+    over the element list.
+    """
+
+    def __init__(self, records=()):
+        self.records = list(records)
+        self._spatial = None
+        self._by_index = {}
+        self._by_resource_id = {}
+        self._by_text = {}
+        for record in self.records:
+            self._by_index[record.index] = record
+            if record.resource_id:
+                self._by_resource_id.setdefault(record.short_resource_id, []).append(record)
+            # Icons often only carry a content description, so index it alongside text
+            for label in {record.text, record.content_desc}:
+                if label:
+                    self._by_text.setdefault(label, []).append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def get(self, index):
+        """Return the record with the given index, or None."""
+        return self._by_index.get(index)
+
+    def by_resource_id(self, resource_id: str) -> list:
+        """Records with a resource-id, given either short ("search") or full ("com.app:id/search")."""
+        return list(self._by_resource_id.get(resource_id.split('/')[-1], []))
+
+    def by_text(self, text: str) -> list:
+        """Records whose text or content description equals the given text."""
+        return list(self._by_text.get(text, []))
+
+    def text_field(self):
+        """The focused text field in the snapshot, else the first one, else None."""
+        fields = [record for record in self.records if record.is_text_field]
+        return next((record for record in fields if record.focused), fields[0] if fields else None)
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        """Spatial index over the snapshot's bounds, built on first use."""
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self.records)
+        return self._spatial
+
+    def to_dicts(self) -> list:
+        """Element dicts for the agent, in screen (page-source) order."""
+        return [record.to_dict() for record in self.records]
@@ -0,0 +1,147 @@
+"""
+Compiled element filters for the Android environment.
+Turns the filter.json configuration into set and regex lookups evaluated once per node.
+
+Configuration keys (all optional; lists of strings):
+
+    filter                text values to hide (exact, surrounding whitespace ignored)
+    class_filter          classes to hide
+    text_regex            regular expressions searched in the text
+    resource_id_filter    resource-ids to hide, short ("ad_banner") or full ("com.app:id/ad_banner")
+    resource_id_regex     regular expressions searched in the full resource-id
+    prune                 object with the same keys (text, class, text_regex, resource_id,
+                          resource_id_regex): matching nodes are dropped with their whole subtree
+    packages              {"com.some.app": {...}}: extra rules for nodes of that package,
+                          added to the top-level ones
+
+Hidden nodes are not reported but their children still are; pruned nodes are
+not even visited.
+"""
+
+import json
+import re
+from functools import lru_cache
+
+# Filter decisions for a node
+KEEP = 0
+HIDE = 1
+PRUNE = 2
+
+# Top-level key -> rule kind, and the same for the "prune" section
+_HIDE_KEYS = {
+    "filter": "text", "class_filter": "class", "text_regex": "text_regex",
+    "resource_id_filter": "resource_id", "resource_id_regex": "resource_id_regex",
+}
+_PRUNE_KEYS = {
+    "text": "text", "class": "class", "text_regex": "text_regex",
+    "resource_id": "resource_id", "resource_id_regex": "resource_id_regex",
+}
+
+
+def _combined_regex(patterns):
+    """One alternation for a list of patterns, or None."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class _RuleSet:
+    """Set/regex lookups for one decision (hide or prune)."""
+
+    def __init__(self, rules: dict):
+        self.texts = frozenset(text.strip() for text in rules.get("text", ()))
+        self.classes = frozenset(rules.get("class", ()))
+        self.resource_ids = frozenset(rules.get("resource_id", ()))
+        self.text_regex = _combined_regex(rules.get("text_regex"))
+        self.resource_id_regex = _combined_regex(rules.get("resource_id_regex"))
+        self.empty = not (self.texts or self.classes or self.resource_ids or self.text_regex or self.resource_id_regex)
+
+    def matches(self, attrib) -> bool:
+        if self.empty:
+            return False
+        if self.classes and attrib.get("class", "") in self.classes:
+            return True
+        if self.texts or self.text_regex:
+            text = attrib.get("text", "").strip()
+            if text in self.texts or (self.text_regex and text and self.text_regex.search(text)):
+                return True
+        if self.resource_ids or self.resource_id_regex:
+            resource_id = attrib.get("resource-id", "")
+            if resource_id:
+                if resource_id in self.resource_ids or resource_id.split('/')[-1] in self.resource_ids:
+                    return True
+                if self.resource_id_regex and self.resource_id_regex.search(resource_id):
+                    return True
+        return False
+
+
+def _collect(config: dict) -> tuple:
+    """Split a configuration section into (hide rules, prune rules) by rule kind."""
+    hide, prune = {}, {}
+    for key, kind in _HIDE_KEYS.items():
+        hide.setdefault(kind, []).extend(config.get(key, ()))
+    for key, kind in _PRUNE_KEYS.items():
+        prune.setdefault(kind, []).extend(config.get("prune", {}).get(key, ()))
+    return hide, prune
+
+
+def _merge(base: dict, extra: dict) -> dict:
+    return {kind: base.get(kind, []) + extra.get(kind, []) for kind in set(base) | set(extra)}
+
+
+class ElementFilter:
+    """
+    A filter.json configuration compiled into per-package rule sets.
+
+    Use compile_filters() to get a cached instance from a config dict.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.key = json.dumps(config, sort_keys=True)
+        self._hide, self._prune = _collect(config)
+        self._profiles = {package: _collect(profile) for package, profile in config.get("packages", {}).items()}
+        self._compiled = {}
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, "r") as fp:
+            return cls(json.load(fp))
+
+    def _rules(self, package: str) -> tuple:
+        """(hide, prune) rule sets for nodes of a package, compiled on first use."""
+        rules = self._compiled.get(package)
+        if rules is None:
+            hide, prune = self._hide, self._prune
+            if package in self._profiles:
+                profile_hide, profile_prune = self._profiles[package]
+                hide, prune = _merge(hide, profile_hide), _merge(prune, profile_prune)
+            rules = self._compiled[package] = (_RuleSet(hide), _RuleSet(prune))
+        return rules
+
+    def action(self, attrib) -> int:
+        """KEEP, HIDE or PRUNE for a node's attributes."""
+        hide, prune = self._rules(attrib.get("package", ""))
+        if prune.matches(attrib):
+            return PRUNE
+        if hide.matches(attrib):
+            return HIDE
+        return KEEP
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(key: str) -> ElementFilter:
+    return ElementFilter(json.loads(key))
+
+
+def compile_filters(filters):
+    """
+    ElementFilter for a filter configuration (dict, ElementFilter or None).
+
+    Dicts are compiled once per distinct content; empty configurations give None.
+    """
+    if not filters:
+        return None
+    if isinstance(filters, ElementFilter):
+        return filters
+    return _compile_cached(json.dumps(filters, sort_keys=True))
@@ -0,0 +1,185 @@
+"""
+UI hierarchy parsing for the Android environment.
+Turns the UiAutomator2 page source into the element records handed to the agent.
+"""
+
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+
+from environment.elements import ElementRecord
+from environment.filters import KEEP, PRUNE, compile_filters
+
+# Characters fed to the pull parser per step
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Packages whose text changes on its own (status bar clock, battery level, ...)
+VOLATILE_PACKAGES = ("com.android.systemui",)
+
+_VOLATILE_NODE_RE = re.compile(
+    r'<[^<>]*\bpackage="(?:' + "|".join(re.escape(p) for p in VOLATILE_PACKAGES) + r')"[^<>]*>'
+)
+_VOLATILE_ATTR_RE = re.compile(r'\b(text|content-desc)="[^"]*"')
+
+
+def parse_bounds(bounds_str):
+    """
+    Parses a bounds string formatted as "[left,top][right,bottom]".
+    Returns a tuple: (left, top, right, bottom), or (0,0,0,0) if parsing fails.
+    """
+    matches = re.findall(r'\d+', bounds_str)
+    if len(matches) >= 4:
+        return tuple(map(int, matches[:4]))
+    return (0, 0, 0, 0)
+
+
+def fingerprint_page_source(page_source: str) -> str:
+    """
+    Hash a page source for change detection.
+
+    Text and content descriptions of nodes from VOLATILE_PACKAGES are blanked
+    first, so a ticking clock does not count as a screen change.
+    """
+    normalized = _VOLATILE_NODE_RE.sub(lambda m: _VOLATILE_ATTR_RE.sub(r'\1=""', m.group(0)), page_source)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def filter_action(attrib, element_filter) -> int:
+    """KEEP, HIDE or PRUNE for a node under a compiled ElementFilter (or None)."""
+    return element_filter.action(attrib) if element_filter is not None else KEEP
+
+
+def _child_index(attrib) -> int:
+    try:
+        return int(attrib.get("index", 0))
+    except ValueError:
+        return 0
+
+
+def build_node_record(attrib, parent=None):
+    """Record for an ancestor node that is not itself reported (index None)."""
+    left, top, right, bottom = parse_bounds(attrib.get("bounds", ""))
+    return ElementRecord(None, attrib.get("text", "").strip(), attrib.get("class", ""),
+                         attrib.get("content-desc", "").strip(), attrib.get("resource-id", ""),
+                         attrib.get("clickable", "false") == "true", left, top, right, bottom,
+                         focused=attrib.get("focused", "false") == "true", parent=parent,
+                         child_index=_child_index(attrib), checked=attrib.get("checked", "false") == "true")
+
+
+def build_element_record(attrib, index, screen_width, screen_height, include_all=False, parent=None):
+    """
+    Build the element record for a single node.
+
+    Returns None when the node lies off screen or carries nothing worth reporting.
+    """
+    element_text = attrib.get("text", "").strip()
+    element_class = attrib.get("class", "")
+    content_desc = attrib.get("content-desc", "").strip()
+    clickable = attrib.get("clickable", "false") == "true"
+    focusable = attrib.get("focusable", "false") == "true"
+    enabled = attrib.get("enabled", "true") == "true"
+    resource_id = attrib.get("resource-id", "")
+
+    left, top, right, bottom = parse_bounds(attrib.get("bounds", ""))
+    center_x = (left + right) // 2
+    center_y = (top + bottom) // 2
+
+    # Check if element is within screen bounds
+    if not (0 <= center_x < screen_width and 0 <= center_y < screen_height):
+        return None
+
+    # Determine if element should be included
+    is_interactive = clickable or focusable or element_class.endswith("EditText")
+    has_content = element_text or content_desc
+    if not (include_all or (is_interactive and enabled) or has_content):
+        return None
+
+    return ElementRecord(index, element_text, element_class, content_desc, resource_id, clickable,
+                         left, top, right, bottom, focused=attrib.get("focused", "false") == "true",
+                         parent=parent, child_index=_child_index(attrib),
+                         checked=attrib.get("checked", "false") == "true")
+
+
+def collect_tree_elements(element, records, screen_width, screen_height, filters=None, include_all=False,
+                          parent=None):
+    """
+    Recursively collect element records from a parsed XML tree (the legacy "tree" parser).
+
+    `filters` is a compiled ElementFilter (see compile_filters) or None.
+    """
+    action = filter_action(element.attrib, filters)
+    if action == PRUNE:
+        return
+    record = None
+    if action == KEEP:
+        record = build_element_record(element.attrib, len(records), screen_width, screen_height,
+                                      include_all, parent=parent)
+        if record is not None:
+            records.append(record)
+    if record is None and len(element):
+        record = build_node_record(element.attrib, parent)
+
+    # Recurse into children
+    for child in element:
+        collect_tree_elements(child, records, screen_width, screen_height, filters, include_all, parent=record)
+
+
+def iter_screen_elements(page_source, screen_width, screen_height, filters=None, include_all=False):
+    """
+    Stream element records out of a page source in a single pass.
+
+    Uses an incremental pull parser instead of building the whole tree first:
+    nodes are handled on their start event (document order, same indexes as the
+    recursive walk) and released on their end event, so memory stays bounded by
+    the depth of the hierarchy rather than its size.
+    """
+    element_filter = compile_filters(filters)
+    parser = ET.XMLPullParser(events=("start", "end"))
+    open_nodes = []
+    open_records = []  # Record of each open node, built only once something below it is reported
+    index = 0
+    pruned_depth = None  # Depth of the pruned node whose subtree is being skipped
+
+    def ancestor_record(depth):
+        missing = depth
+        while missing >= 0 and open_records[missing] is None:
+            missing -= 1
+        for level in range(missing + 1, depth + 1):
+            parent = open_records[level - 1] if level > 0 else None
+            open_records[level] = build_node_record(open_nodes[level].attrib, parent)
+        return open_records[depth] if depth >= 0 else None
+
+    def drain():
+        nonlocal index, pruned_depth
+        for event, node in parser.read_events():
+            if event == "start":
+                open_nodes.append(node)
+                open_records.append(None)
+                if pruned_depth is not None:
+                    continue
+                action = filter_action(node.attrib, element_filter)
+                if action == PRUNE:
+                    pruned_depth = len(open_nodes)
+                if action != KEEP:
+                    continue
+                record = build_element_record(node.attrib, index, screen_width, screen_height, include_all)
+                if record is not None:
+                    record.parent = ancestor_record(len(open_nodes) - 2)
+                    open_records[-1] = record
+                    index += 1
+                    yield record
+            else:
+                if pruned_depth == len(open_nodes):
+                    pruned_depth = None
+                open_nodes.pop()
+                open_records.pop()
+                node.clear()
+                # Every earlier sibling has already ended, so the parent can drop them all
+                if open_nodes:
+                    del open_nodes[-1][:]
+
+    for offset in range(0, len(page_source), PARSE_CHUNK_SIZE):
+        parser.feed(page_source[offset:offset + PARSE_CHUNK_SIZE])
+        yield from drain()
+    parser.close()
+    yield from drain()
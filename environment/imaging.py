@@ -0,0 +1,261 @@
+"""
+Screenshot image helpers for the Android environment.
+Encoding, perceptual hashing, frame comparison, and the downscale/encode pipeline
+used for vision model calls.
+"""
+
+import os
+import sys
+import base64
+import time
+from io import BytesIO
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import VisionImageConfig
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# PIL format names for the formats consumers ask for
+IMAGE_FORMATS = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "webp": "WEBP"}
+
+
+def encode_image(img, image_format: str = "png", quality: int = None) -> bytes:
+    """
+    Encode a PIL image once in the requested format.
+
+    Args:
+        img: PIL Image
+        image_format: 'png', 'jpeg'/'jpg' or 'webp'
+        quality: Lossy quality (JPEG/WebP only)
+    """
+    pil_format = IMAGE_FORMATS.get(image_format.lower())
+    if pil_format is None:
+        raise ValueError(f"Unsupported image format: {image_format}. Valid formats: {list(IMAGE_FORMATS)}")
+    if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    params = {}
+    if quality is not None and pil_format != "PNG":
+        params["quality"] = quality
+    output = BytesIO()
+    img.save(output, format=pil_format, **params)
+    return output.getvalue()
+
+
+# Brightness step (0-255) a dHash bit needs, so noise on flat UI backgrounds doesn't flip bits
+HASH_MARGIN = 2
+
+
+def perceptual_hash(img, hash_size: int = 16) -> int:
+    """
+    Difference hash (dHash) of a screenshot: hash_size^2 bits, one per pair of
+    horizontally adjacent cells of a grayscale thumbnail, set where brightness
+    rises to the right by more than HASH_MARGIN.
+
+    Recompression noise leaves it unchanged; navigation and layout changes flip
+    many bits, but a small repaint (a toggled checkbox) may flip none.
+    """
+    width, height = hash_size + 1, hash_size
+    factor = min(img.width // width, img.height // height)
+    if factor >= 4:
+        img = img.reduce(factor // 2)  # Cheap box pre-shrink, the resize below does the rest
+    pixels = img.convert("L").resize((width, height), Image.BOX).tobytes()
+    bits = 0
+    for row in range(0, width * height, width):
+        for col in range(row, row + hash_size):
+            bits = (bits << 1) | (pixels[col + 1] > pixels[col] + HASH_MARGIN)
+    return bits
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two perceptual hashes."""
+    return bin(a ^ b).count("1")
+
+
+def frame_thumbnail(img, width: int = 96):
+    """
+    Grayscale thumbnail of a screenshot as a 2-D int16 array, for frame_change().
+
+    Box-averaged, so each thumbnail pixel is the mean brightness of a
+    (screen width / width)-pixel square of the screen.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is not installed")
+    height = max(1, round(img.height * width / img.width))
+    factor = min(img.width // width, img.height // height)
+    if factor >= 2:
+        img = img.reduce(factor)
+    return np.asarray(img.convert("L").resize((width, height), Image.BOX), dtype=np.int16)
+
+
+def frame_change(previous, current, pixel_threshold: int = 12, ignore_top: float = 0.0) -> dict:
+    """
+    How much of the screen differs between two frame_thumbnail() arrays.
+
+    Args:
+        previous: Thumbnail of the earlier frame
+        current: Thumbnail of the new frame
+        pixel_threshold: Brightness difference (0-255) a thumbnail pixel needs to count as changed
+        ignore_top: Fraction of the height to skip at the top (status bar clock and icons)
+
+    Returns:
+        {"changed_fraction": 0..1, "region": (left, top, right, bottom) as fractions of
+        the screen, or None when nothing changed}
+    """
+    if previous.shape != current.shape:
+        return {"changed_fraction": 1.0, "region": (0.0, 0.0, 1.0, 1.0)}
+    changed = np.abs(current - previous) > pixel_threshold
+    changed[:int(changed.shape[0] * ignore_top)] = False
+    count = int(np.count_nonzero(changed))
+    if not count:
+        return {"changed_fraction": 0.0, "region": None}
+    rows = np.flatnonzero(changed.any(axis=1))
+    cols = np.flatnonzero(changed.any(axis=0))
+    height, width = changed.shape
+    return {
+        "changed_fraction": count / changed.size,
+        "region": (float(cols[0] / width), float(rows[0] / height),
+                   float((cols[-1] + 1) / width), float((rows[-1] + 1) / height)),
+    }
+
+
+def mime_type(image_format: str) -> str:
+    """MIME type for an image format name."""
+    return "image/" + IMAGE_FORMATS.get(image_format.lower(), "PNG").lower()
+
+
+class EncodedImage:
+    """
+    An encoded screenshot plus what is needed to map it back to the device.
+
+    Coordinates read off the image are scaled by the exact device/image size
+    ratio per axis, so they land on the same device pixel regardless of rounding
+    in the downscaled size. For a crop, device_width/device_height are the size
+    of the cropped device region and offset_x/offset_y its top-left corner.
+    """
+
+    __slots__ = ("data", "image_format", "width", "height", "device_width", "device_height", "encode_ms",
+                 "offset_x", "offset_y")
+
+    def __init__(self, data: bytes, image_format: str, width: int, height: int,
+                 device_width: int, device_height: int, encode_ms: float, offset: tuple = (0, 0)):
+        self.data = data
+        self.image_format = image_format
+        self.width = width
+        self.height = height
+        self.device_width = device_width
+        self.device_height = device_height
+        self.encode_ms = encode_ms
+        self.offset_x, self.offset_y = offset
+
+    @property
+    def mime_type(self) -> str:
+        return mime_type(self.image_format)
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+    def to_device(self, x: float, y: float) -> tuple:
+        """Image pixel -> device pixel."""
+        return (self.offset_x + min(int(x * self.device_width / self.width), self.device_width - 1),
+                self.offset_y + min(int(y * self.device_height / self.height), self.device_height - 1))
+
+    def to_image(self, x: float, y: float) -> tuple:
+        """Device pixel -> image pixel."""
+        return (int((x - self.offset_x) * self.width / self.device_width),
+                int((y - self.offset_y) * self.height / self.device_height))
+
+
+class ImagePipeline:
+    """
+    Screenshot -> downscale -> (grayscale) -> overlay -> encode, with size and timing stats.
+
+    Overlays such as the grid are drawn after downscaling, at the final
+    resolution, so labels stay legible however small the image gets. A region
+    of the screen can be cropped first and scaled (up, if need be) on its own.
+    """
+
+    def __init__(self, max_edge: int = None, image_format: str = None, quality: int = None, grayscale: bool = None):
+        """
+        Args:
+            max_edge: Longest edge after downscaling, 0 to keep the device resolution
+                (default VisionImageConfig.MAX_EDGE)
+            image_format: 'png', 'jpeg' or 'webp' (default VisionImageConfig.FORMAT)
+            quality: JPEG/WebP quality (default VisionImageConfig.QUALITY)
+            grayscale: Convert to grayscale before the overlay (default VisionImageConfig.GRAYSCALE)
+        """
+        self.max_edge = VisionImageConfig.MAX_EDGE if max_edge is None else max_edge
+        self.image_format = (image_format or VisionImageConfig.FORMAT).lower()
+        self.quality = VisionImageConfig.QUALITY if quality is None else quality
+        self.grayscale = VisionImageConfig.GRAYSCALE if grayscale is None else grayscale
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}. Valid formats: {list(IMAGE_FORMATS)}")
+        self.stats = {"frames": 0, "bytes": 0, "encode_ms": 0.0, "last_bytes": 0, "last_encode_ms": 0.0}
+
+    def target_size(self, width: int, height: int, max_edge: int = None, upscale: bool = False) -> tuple:
+        """Size with the longest edge at max_edge (default self.max_edge); only grows if upscale."""
+        max_edge = self.max_edge if max_edge is None else max_edge
+        scale = max_edge / max(width, height) if max_edge else 1.0
+        if scale >= 1.0 and not upscale:
+            return width, height
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def process(self, img, overlay=None, device_size: tuple = None, region: tuple = None,
+                max_edge: int = None) -> EncodedImage:
+        """
+        Run a screenshot through the pipeline.
+
+        Args:
+            img: PIL Image of the whole screen
+            overlay: Optional callable(img) -> img drawn on the final-size image (e.g. the grid)
+            device_size: (width, height) the coordinates map back to (default: img.size)
+            region: Optional (left, top, right, bottom) in device pixels to crop to; the
+                crop is scaled to max_edge even if that enlarges it
+            max_edge: Longest edge of the result (default self.max_edge)
+        """
+        start = time.perf_counter()
+        device_width, device_height = device_size or img.size
+        offset = (0, 0)
+        if region is not None:
+            left, top, right, bottom = region
+            scale_x, scale_y = img.width / device_width, img.height / device_height
+            img = img.crop((round(left * scale_x), round(top * scale_y), round(right * scale_x), round(bottom * scale_y)))
+            offset = (left, top)
+            device_width, device_height = right - left, bottom - top
+        if img.mode == "RGBA":
+            img = img.convert("RGB")  # Screenshots are opaque; half the work for every later step
+        size = self.target_size(*img.size, max_edge=max_edge, upscale=region is not None)
+        if size != img.size:
+            # Box-average by the integer part of the ratio first, then Lanczos the rest
+            factor = min(img.width // size[0], img.height // size[1])
+            if factor >= 2:
+                img = img.reduce(factor)
+            img = img.resize(size, Image.LANCZOS)
+        if self.grayscale:
+            img = img.convert("L")
+        if overlay is not None:
+            img = overlay(img)
+        data = encode_image(img, self.image_format, self.quality)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        self.stats["frames"] += 1
+        self.stats["bytes"] += len(data)
+        self.stats["encode_ms"] += encode_ms
+        self.stats["last_bytes"] = len(data)
+        self.stats["last_encode_ms"] = round(encode_ms, 1)
+        return EncodedImage(data, self.image_format, img.width, img.height, device_width, device_height, encode_ms,
+                            offset)
@@ -0,0 +1,144 @@
+"""
+Device pool for running several agent sessions at once.
+Discovers attached devices, gives each its own UiAutomator2 system port and
+leases Android sessions to tasks with health checks.
+"""
+
+import os
+import sys
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import AppiumConfig
+from environment.Android import Android
+from environment.adb import discover_devices
+
+# Seconds a waiting acquire() sleeps between checks for free or healthy devices
+POLL_INTERVAL = 1.0
+
+
+class DevicePool:
+    """
+    Pool of Android sessions, one per attached device.
+
+    Sessions are created lazily on first lease and reused afterwards. Every
+    lease health-checks the session first; a dead session is replaced, and a
+    device whose session cannot be (re)created is taken out of rotation.
+    """
+
+    def __init__(self, udids: list = None, base_system_port: int = None, **android_kwargs):
+        """
+        Args:
+            udids: Device serials to use (default: every device `adb devices` reports)
+            base_system_port: First UiAutomator2 system port (default: AppiumConfig.BASE_SYSTEM_PORT)
+            **android_kwargs: Extra keyword arguments for every Android session
+        """
+        self.udids = list(udids) if udids else discover_devices()
+        if not self.udids:
+            raise RuntimeError("No Android devices found. Check `adb devices`.")
+
+        base_port = base_system_port or AppiumConfig.BASE_SYSTEM_PORT
+        self.system_ports = {udid: base_port + i for i, udid in enumerate(self.udids)}
+        self.android_kwargs = android_kwargs
+        self.unhealthy = set()
+
+        self._sessions = {}
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+        for udid in self.udids:
+            self._free.put(udid)
+
+    def __len__(self):
+        return len(self.udids) - len(self.unhealthy)
+
+    @staticmethod
+    def _is_healthy(android: Android) -> bool:
+        """Cheap liveness probe for a session."""
+        try:
+            android.driver.current_package
+            return True
+        except Exception:
+            return False
+
+    def _close_session(self, udid: str):
+        android = self._sessions.pop(udid, None)
+        if android is not None:
+            try:
+                android.end_driver()
+            except Exception:
+                pass
+
+    def _session(self, udid: str):
+        """Return a healthy session for a device, (re)creating it if needed, or None."""
+        android = self._sessions.get(udid)
+        if android is not None and self._is_healthy(android):
+            return android
+        self._close_session(udid)
+
+        try:
+            android = Android(udid=udid, system_port=self.system_ports[udid], **self.android_kwargs)
+        except Exception as e:
+            print(f"[DevicePool] Could not start a session on {udid}: {e}")
+            with self._lock:
+                self.unhealthy.add(udid)
+            return None
+        self._sessions[udid] = android
+        return android
+
+    def acquire(self, timeout: float = None) -> Android:
+        """
+        Lease a session, blocking until a device is free.
+
+        Waits in short slices so a waiter notices when the last healthy device
+        is taken out of rotation by another lease.
+
+        Raises:
+            TimeoutError: No device became free within the timeout
+            RuntimeError: Every device in the pool is unhealthy
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if len(self) == 0:
+                raise RuntimeError("No healthy devices left in the pool")
+            wait = POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No device became free within {timeout}s")
+                wait = min(wait, remaining)
+            try:
+                udid = self._free.get(timeout=wait)
+            except queue.Empty:
+                continue
+            android = self._session(udid)
+            if android is not None:
+                return android
+
+    def release(self, android: Android, healthy: bool = True):
+        """Return a leased session; unhealthy sessions are dropped and recreated on the next lease."""
+        if not healthy:
+            self._close_session(android.udid)
+        self._free.put(android.udid)
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """Context manager around acquire/release; the session is dropped if the block raises."""
+        android = self.acquire(timeout)
+        healthy = True
+        try:
+            yield android
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(android, healthy=healthy and self._is_healthy(android))
+
+    def close(self):
+        """End every session in the pool."""
+        for udid in list(self._sessions):
+            self._close_session(udid)
@@ -0,0 +1,200 @@
+"""
+Local selector queries over the cached element snapshot.
+
+Selectors are CSS-like and are compiled once into predicate chains:
+
+    EditText                              class (short or full name), * for any
+    [text="Sign in"]                      exact text; also desc, id, class
+    [text~=sign]                          substring (case-insensitive); ^= prefix, $= suffix
+    [text~=sign in]                       unquoted values run up to the closing bracket
+    [desc=/^Search/i]                     regular expression
+    :clickable  :focused  :editable       state
+    :nth-child(2)                         position among siblings (1-based)
+    :in(0,0,1080,600)                     element center inside a region
+    RecyclerView[id=list] TextView        whitespace = "inside an ancestor matching"
+"""
+
+import re
+from functools import lru_cache
+
+# Attribute names accepted in [name op value] -> ElementRecord field
+ATTRIBUTES = {
+    "text": "text",
+    "desc": "content_desc",
+    "content-desc": "content_desc",
+    "content_desc": "content_desc",
+    "id": "resource_id",
+    "resource-id": "resource_id",
+    "resource_id": "resource_id",
+    "class": "class_name",
+}
+
+_TYPE_RE = re.compile(r'\*|[A-Za-z_][\w.$]*')
+_ATTR_RE = re.compile(
+    r'\[\s*([\w-]+)\s*(=|~=|\^=|\$=)\s*'
+    r'(?:"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'|/((?:[^/\\]|\\.)*)/([imsx]*)|([^\]\s](?:[^\]]*[^\]\s])?))\s*\]'
+)
+_PSEUDO_RE = re.compile(r':([\w-]+)(?:\(([^)]*)\))?')
+
+
+class SelectorError(ValueError):
+    """Raised for selectors that can't be parsed."""
+
+
+def _short(value: str, separator: str) -> str:
+    return value.split(separator)[-1] if value else ""
+
+
+def _attribute_predicate(name, op, value, regex_flags):
+    field = ATTRIBUTES.get(name.lower())
+    if field is None:
+        raise SelectorError(f"Unknown attribute [{name}]. Valid attributes: {sorted(set(ATTRIBUTES))}")
+
+    # Ids and classes may be written short ("search_box", "Button") or in full
+    separator = {"resource_id": "/", "class_name": "."}.get(field)
+
+    def values(record):
+        full = getattr(record, field)
+        return (full, _short(full, separator)) if separator else (full,)
+
+    if regex_flags is not None:
+        if op != "=":
+            raise SelectorError(f"Regular expressions only work with '=': [{name}{op}/{value}/]")
+        flags = 0
+        for flag in regex_flags:
+            flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}[flag]
+        try:
+            pattern = re.compile(value, flags)
+        except re.error as e:
+            raise SelectorError(f"Invalid regular expression /{value}/: {e}")
+        return lambda record: any(pattern.search(v) for v in values(record))
+
+    if op == "=":
+        return lambda record: value in values(record)
+    needle = value.lower()
+    if op == "~=":
+        return lambda record: any(needle in v.lower() for v in values(record))
+    if op == "^=":
+        return lambda record: any(v.lower().startswith(needle) for v in values(record))
+    return lambda record: any(v.lower().endswith(needle) for v in values(record))
+
+
+def _int_args(name, args, count):
+    try:
+        numbers = [int(arg) for arg in (args or "").split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise SelectorError(f":{name} expects {count} integer argument(s), got ({args or ''})")
+    return numbers
+
+
+def _pseudo_predicate(name, args):
+    if name == "clickable":
+        return lambda record: record.clickable
+    if name == "focused":
+        return lambda record: record.focused
+    if name == "editable":
+        return lambda record: record.is_text_field
+    if name == "nth-child":
+        position = _int_args(name, args, 1)[0] - 1
+        return lambda record: record.child_index == position
+    if name == "in":
+        left, top, right, bottom = _int_args(name, args, 4)
+        return lambda record: left <= record.center_x <= right and top <= record.center_y <= bottom
+    raise SelectorError(f"Unknown pseudo-class :{name}. Valid: :clickable, :focused, :editable, :nth-child(n), :in(l,t,r,b)")
+
+
+def _parse_compound(source, pos):
+    """Parse one compound selector starting at pos; returns (predicates, new_pos)."""
+    predicates = []
+    start = pos
+    match = _TYPE_RE.match(source, pos)
+    if match:
+        type_name = match.group(0)
+        if type_name != "*":
+            predicates.append(lambda record, t=type_name: t in (record.class_name, record.short_class))
+        pos = match.end()
+
+    while pos < len(source) and not source[pos].isspace():
+        if source[pos] == "[":
+            match = _ATTR_RE.match(source, pos)
+            if not match:
+                raise SelectorError(f"Malformed attribute at position {pos}: {source[pos:]}")
+            name, op, double_q, single_q, regex, regex_flags, bare = match.groups()
+            value = next(v for v in (double_q, single_q, regex, bare) if v is not None)
+            if regex is None:
+                regex_flags = None
+                value = re.sub(r'\\(.)', r'\1', value)
+            predicates.append(_attribute_predicate(name, op, value, regex_flags))
+        elif source[pos] == ":":
+            match = _PSEUDO_RE.match(source, pos)
+            if not match:
+                raise SelectorError(f"Malformed pseudo-class at position {pos}: {source[pos:]}")
+            predicates.append(_pseudo_predicate(match.group(1), match.group(2)))
+        else:
+            raise SelectorError(f"Unexpected character {source[pos]!r} at position {pos}")
+        pos = match.end()
+
+    if pos == start:
+        raise SelectorError(f"Unexpected character {source[pos]!r} at position {pos}")
+    return predicates, pos
+
+
+class Selector:
+    """A compiled selector; use compile_selector() to get cached instances."""
+
+    def __init__(self, source: str):
+        self.source = source.strip()
+        if not self.source:
+            raise SelectorError("Empty selector")
+        self.steps = []
+        pos = 0
+        while pos < len(self.source):
+            predicates, pos = _parse_compound(self.source, pos)
+            self.steps.append(predicates)
+            while pos < len(self.source) and self.source[pos].isspace():
+                pos += 1
+
+    @staticmethod
+    def _step_matches(predicates, record) -> bool:
+        return all(predicate(record) for predicate in predicates)
+
+    def matches(self, record) -> bool:
+        if not self._step_matches(self.steps[-1], record):
+            return False
+        # Earlier steps must match ancestors, in order, closest first
+        node = record.parent
+        for predicates in reversed(self.steps[:-1]):
+            while node is not None and not self._step_matches(predicates, node):
+                node = node.parent
+            if node is None:
+                return False
+            node = node.parent
+        return True
+
+    def select(self, records, limit: int = None) -> list:
+        """Matching records in snapshot order."""
+        matches = []
+        for record in records:
+            if self.matches(record):
+                matches.append(record)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+
+@lru_cache(maxsize=256)
+def compile_selector(source: str) -> Selector:
+    """Compile (and cache) a selector string."""
+    return Selector(source)
+
+
+# Selectors shown to the model (system prompt, tool definitions) and in this module's docs
+SELECTOR_EXAMPLES = (
+    'EditText', '*', '[text="Sign in"]', '[text~=sign]', '[text~=sign in]', '[desc~=search]', '[id^=btn]',
+    '[text$=now]', r'[text=/^\d+ items$/i]', '[desc=/^Search/i]', ':clickable :focused :editable',
+    ':nth-child(2)', ':in(0,0,1080,600)', 'RecyclerView[id=list] TextView',
+    'Button[text~="sign in"]', 'RecyclerView TextView:nth-child(1)', 'Button[text~="add to cart"]:clickable',
+)
+
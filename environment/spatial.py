@@ -0,0 +1,89 @@
+"""
+Spatial index over element bounds.
+Answers point and region queries against a snapshot without scanning every element.
+"""
+
+# Bucket edge in pixels; roughly one list row / toolbar button on a 1080p screen
+CELL_SIZE = 128
+
+
+class SpatialIndex:
+    """
+    Uniform grid of buckets over element bounds.
+
+    Each record is stored in every bucket its bounds overlap, so a point query
+    only looks at the handful of elements in one bucket. Document order doubles
+    as z-order: a later node in the page source is drawn above earlier ones.
+    """
+
+    def __init__(self, records, cell_size: int = CELL_SIZE):
+        """
+        Args:
+            records: ElementRecords in page-source order
+            cell_size: Bucket edge in pixels
+        """
+        self.records = list(records)
+        self.cell_size = cell_size
+        self._buckets = {}
+        for position, record in enumerate(self.records):
+            if record.right <= record.left or record.bottom <= record.top:
+                continue
+            for key in self._keys(record.left, record.top, record.right - 1, record.bottom - 1):
+                self._buckets.setdefault(key, []).append(position)
+
+    def _keys(self, left, top, right, bottom):
+        size = self.cell_size
+        for col in range(left // size, right // size + 1):
+            for row in range(top // size, bottom // size + 1):
+                yield col, row
+
+    def _candidates(self, left, top, right, bottom):
+        """Positions of records in the buckets overlapping a region, in document order."""
+        positions = set()
+        for key in self._keys(left, top, right, bottom):
+            positions.update(self._buckets.get(key, ()))
+        return sorted(positions)
+
+    def at(self, x: int, y: int, clickable: bool = False) -> list:
+        """Records containing (x, y), topmost first."""
+        hits = []
+        for position in reversed(self._buckets.get((x // self.cell_size, y // self.cell_size), ())):
+            record = self.records[position]
+            if record.left <= x < record.right and record.top <= y < record.bottom:
+                if record.clickable or not clickable:
+                    hits.append(record)
+        return hits
+
+    def topmost(self, x: int, y: int, clickable: bool = True):
+        """The topmost (clickable) record containing (x, y), or None."""
+        hits = self.at(x, y, clickable=clickable)
+        return hits[0] if hits else None
+
+    def intersecting(self, left: int, top: int, right: int, bottom: int, clickable: bool = False) -> list:
+        """Records whose bounds overlap the region [left, right) x [top, bottom), in document order."""
+        if right <= left or bottom <= top:
+            return []
+        hits = []
+        for position in self._candidates(left, top, right - 1, bottom - 1):
+            record = self.records[position]
+            if record.left < right and left < record.right and record.top < bottom and top < record.bottom:
+                if record.clickable or not clickable:
+                    hits.append(record)
+        return hits
+
+    def nearest(self, x: int, y: int, radius: int, clickable: bool = True):
+        """
+        The (clickable) record closest to (x, y) within `radius` pixels, or None.
+
+        Distance is measured to the element's bounds, so a point inside an
+        element has distance 0; ties go to the topmost element.
+        """
+        best = None
+        best_distance = None
+        for record in reversed(self.intersecting(x - radius, y - radius, x + radius + 1, y + radius + 1, clickable)):
+            dx = max(record.left - x, 0, x - (record.right - 1))
+            dy = max(record.top - y, 0, y - (record.bottom - 1))
+            distance = (dx * dx + dy * dy) ** 0.5
+            if distance <= radius and (best_distance is None or distance < best_distance):
+                best, best_distance = record, distance
+        return best
@@ -0,0 +1,148 @@
+"""
+Visibility pass over a screen snapshot.
+Estimates how much of each element can actually be seen (and tapped) once it is
+clipped by the screen and its scrolling ancestors and covered by elements drawn
+above it.
+"""
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Occlusion is measured on a raster of this many pixels per cell
+VISIBILITY_CELL_SIZE = 8
+
+
+def _clip_rects(records, screen_width, screen_height):
+    """
+    Bounds of every record intersected with the screen and all of its ancestors.
+
+    Ancestor clips are memoized per node, so the walk is linear in the number of
+    nodes rather than records x depth.
+    """
+    screen = (0, 0, screen_width, screen_height)
+    clips = {}
+
+    def clip_of(node):
+        # Iterative: walk up to the first memoized ancestor, then fill back down
+        chain = []
+        while node is not None and id(node) not in clips:
+            chain.append(node)
+            node = node.parent
+        rect = clips[id(node)] if node is not None else screen
+        for node in reversed(chain):
+            if node.right > node.left and node.bottom > node.top:
+                rect = (max(rect[0], node.left), max(rect[1], node.top),
+                        min(rect[2], node.right), min(rect[3], node.bottom))
+            clips[id(node)] = rect
+        return rect
+
+    return [clip_of(record) for record in records]
+
+
+def _subtree_ends(records) -> list:
+    """Position of the last reported descendant of each record (itself if none)."""
+    position = {id(record): i for i, record in enumerate(records)}
+    reported_ancestor = {}  # id(node) -> position of the node or its closest reported ancestor
+
+    def closest_reported(node):
+        chain = []
+        while node is not None and id(node) not in reported_ancestor:
+            if id(node) in position:
+                reported_ancestor[id(node)] = position[id(node)]
+                break
+            chain.append(node)
+            node = node.parent
+        found = reported_ancestor[id(node)] if node is not None else None
+        for node in chain:
+            reported_ancestor[id(node)] = found
+        return found
+
+    parents = [closest_reported(record.parent) for record in records]
+    ends = list(range(len(records)))
+    # Descendants come after their ancestors, so one backwards sweep propagates the ends up
+    for i in range(len(records) - 1, -1, -1):
+        if parents[i] is not None and ends[i] > ends[parents[i]]:
+            ends[parents[i]] = ends[i]
+    return ends
+
+
+def compute_visibility(records, screen_width: int, screen_height: int,
+                       cell_size: int = VISIBILITY_CELL_SIZE) -> list:
+    """
+    Visible fraction (0..1) of each record, in order.
+
+    Records must be in page-source order, which doubles as z-order. A record is
+    covered by clickable records drawn after it that are not its own
+    descendants: those intercept the touch. Covered area is found on a raster
+    where each cell holds the topmost clickable record painted over it; since a
+    record's descendants are exactly the records right after it, a cell hides
+    record i iff its owner lies past i's subtree.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is not installed")
+    count = len(records)
+    if count == 0:
+        return []
+
+    bounds = np.array([(r.left, r.top, r.right, r.bottom) for r in records], dtype=np.int64)
+    clipped = np.array(_clip_rects(records, screen_width, screen_height), dtype=np.int64)
+    widths = np.clip(clipped[:, 2] - clipped[:, 0], 0, None)
+    heights = np.clip(clipped[:, 3] - clipped[:, 1], 0, None)
+    areas = (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+    clip_fraction = np.where(areas > 0, widths * heights / np.maximum(areas, 1), 0.0)
+
+    # Clipped rects in raster cells: rounded outwards for the measured element so
+    # small ones keep a cell, inwards for occluders so neighbours don't bleed over
+    cells = np.empty_like(clipped)
+    cells[:, :2] = clipped[:, :2] // cell_size
+    cells[:, 2:] = np.maximum(-(-clipped[:, 2:] // cell_size), cells[:, :2])
+    cover = np.empty_like(clipped)
+    cover[:, :2] = -(-clipped[:, :2] // cell_size)
+    cover[:, 2:] = clipped[:, 2:] // cell_size
+
+    raster = np.full((-(-screen_height // cell_size), -(-screen_width // cell_size)), -1, dtype=np.int32)
+    clickable = np.fromiter((r.clickable for r in records), dtype=bool, count=count)
+    for j in np.flatnonzero(clickable & (clip_fraction > 0)):
+        left, top, right, bottom = cover[j]
+        raster[top:bottom, left:right] = j
+
+    ends = _subtree_ends(records)
+    visibility = clip_fraction.astype(float)
+    for i in np.flatnonzero(clip_fraction > 0):
+        left, top, right, bottom = cells[i]
+        owners = raster[top:bottom, left:right]
+        if owners.size:
+            visibility[i] *= 1.0 - np.count_nonzero(owners > ends[i]) / owners.size
+    return visibility.tolist()
+
+
+def apply_visibility(records, screen_width: int, screen_height: int, threshold: float, drop: bool = True) -> list:
+    """
+    Annotate records with their visible fraction and optionally drop hidden ones.
+
+    Dropped records leave the snapshot and the remaining ones are renumbered,
+    so indexes stay contiguous. Without NumPy the records pass through unchanged.
+
+    Args:
+        records: ElementRecords in page-source order
+        screen_width: Screen width in pixels
+        screen_height: Screen height in pixels
+        threshold: Minimum visible fraction to keep (drop=True) or to not flag
+        drop: Remove records below the threshold instead of only annotating them
+    """
+    records = list(records)
+    if not NUMPY_AVAILABLE:
+        return records
+    for record, visible in zip(records, compute_visibility(records, screen_width, screen_height)):
+        record.visibility = visible
+    if not drop:
+        return records
+
+    kept = [record for record in records if record.visibility >= threshold]
+    for index, record in enumerate(kept):
+        record.index = index
+    return kept
@@ -2,10 +2,11 @@
 Runner module for Amadeus - orchestrates agent execution.
 """
 
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 from agent.main_agent import ActionAgent
 from agent.vision_agent import VisionAgent
+from client import pool_stats
 
 
 class Runner:
@@ -25,9 +26,11 @@ class Runner:
         infinite: bool = False,
         interactive: bool = False, 
         filters: dict = None,
-        vision_mode: bool = False
+        vision_mode: bool = False,
+        element_format: str = None
     ):
         self.latest_msg = ''
+        self.error = None  # Exception that ended the last run early, if any
         self.audio = audio
         self.train = train
         self.multi_agent = multi_agent
@@ -35,14 +38,21 @@ class Runner:
         self.interactive = interactive
         self.filters = filters
         self.vision_mode = vision_mode
+        self.element_format = element_format  # "json" or "compact" (default AgentConfig.ELEMENT_FORMAT)
 
-    def run(self, init_prompt: str):
+    def run(self, init_prompt: str, env=None):
         """
         Run the agent with the given prompt.
         
         Args:
             init_prompt: The task/prompt for the agent to execute
+            env: Optional Android session to drive (e.g. leased from a DevicePool).
+                It is left open afterwards; without it a new session is created and closed.
+                
+        Returns:
+            True if the agent loop ran without an error (the error is kept in self.error)
         """
+        self.error = None
         if self.train:
             from ML.data import log_click_csv
         
@@ -63,7 +73,8 @@ class Runner:
                 on_new_message=self.set_latest_message,
                 infinite=self.infinite,
                 interactive=self.interactive,
-                audio=self.audio
+                audio=self.audio,
+                env=env
             )
         else:
             print("\n🎯 Running in ACTION MODE (UI tree + vision)")
@@ -74,7 +85,9 @@ class Runner:
                 infinite=self.infinite,
                 interactive=self.interactive,
                 audio=self.audio,
-                filters=self.filters
+                filters=self.filters,
+                env=env,
+                element_format=self.element_format
             )
         
         # Run agent loop
@@ -82,7 +95,7 @@ class Runner:
         max_iterations = 50  # Safety limit
         
         while agent.task and iteration <= max_iterations:
-            time.sleep(0.5)  # Small delay between iterations
+            agent.env.settle_pending()  # Let the previous action's UI changes land
             print(f"\n--- Step {iteration} ---")
             
             try:
@@ -91,6 +104,7 @@ class Runner:
                     print(f"Agent: {response[:200]}..." if len(str(response)) > 200 else f"Agent: {response}")
             except Exception as e:
                 print(f"Error in step {iteration}: {e}")
+                self.error = e
                 break
             
             iteration += 1
@@ -103,10 +117,51 @@ class Runner:
             from audio import read
             read(self.latest_msg)
         
+        tokens = getattr(agent, "element_tokens", None)
+        if tokens and tokens["steps"]:
+            saved = tokens["json_tokens"] - tokens["compact_tokens"]
+            print(f"Element list tokens over {tokens['steps']} observations: json={tokens['json_tokens']} "
+                  f"compact={tokens['compact_tokens']} (compact saves {saved / tokens['steps']:.0f} per step)")
+        
+        for pool in pool_stats():
+            print(f"HTTP pool {pool['base_url']}: {pool['requests']} requests over {pool['connections']} "
+                  f"connections ({pool['idle_connections']} idle{', HTTP/2' if pool['http2'] else ''})")
+        
         # Cleanup
         print("\n✅ Session complete")
-        agent.env.end_driver()
+        if env is None:
+            agent.env.end_driver()
+        return self.error is None
 
     def set_latest_message(self, msg: str):
         """Callback to capture the latest agent message."""
         self.latest_msg = msg
+
+
+def run_concurrent(prompts: list, pool, retries: int = 1, **runner_kwargs) -> list:
+    """
+    Run one agent per prompt, as many at once as the pool has devices.
+    
+    Args:
+        prompts: Task prompts
+        pool: environment.pool.DevicePool to lease sessions from
+        retries: How many times a task is re-leased onto another session if it crashes
+        **runner_kwargs: Runner options (vision_mode, filters, ...)
+        
+    Returns:
+        The final agent message for each prompt, in order (None if the task failed)
+    """
+    def run_one(prompt):
+        for attempt in range(retries + 1):
+            try:
+                with pool.lease() as env:
+                    runner = Runner(**runner_kwargs)
+                    if runner.run(prompt, env=env):
+                        return runner.latest_msg
+                print(f"Task failed on attempt {attempt + 1}: {runner.error}")
+            except Exception as e:
+                print(f"Task failed on attempt {attempt + 1}: {e}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pool))) as executor:
+        return list(executor.map(run_one, prompts))
@@ -0,0 +1,29 @@
+"""Shared helpers for the environment tests."""
+
+import os
+import sys
+
+# Make the repository root importable, as the entry-point scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Attributes every UiAutomator2 node carries unless a test overrides them
+NODE_DEFAULTS = {
+    "text": "", "content-desc": "", "resource-id": "", "clickable": "false", "focusable": "false",
+    "enabled": "true", "focused": "false", "checked": "false", "package": "com.example",
+}
+
+
+def node(cls: str, bounds: str, children: str = "", **attrs) -> str:
+    """XML for one hierarchy node; attribute names use _ for - (content_desc, resource_id)."""
+    values = dict(NODE_DEFAULTS, **{key.replace("_", "-"): value for key, value in attrs.items()})
+    values["class"] = cls
+    values["bounds"] = bounds
+    attributes = " ".join(f'{key}="{value}"' for key, value in values.items())
+    return f"<{cls} {attributes}>{children}</{cls}>"
+
+
+def page(*nodes: str, width: int = 1080, height: int = 2400) -> str:
+    """A complete page source around top-level nodes."""
+    return (f"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+            f'<hierarchy index="0" class="hierarchy" rotation="0" width="{width}" height="{height}">'
+            f"{''.join(nodes)}</hierarchy>")
@@ -0,0 +1,91 @@
+"""since_last diffs: matching records across snapshots and carrying their indexes over."""
+
+from conftest import node, page
+from environment.diff import carry_over_indexes, describe_change, diff_records
+from environment.hierarchy import iter_screen_elements
+
+
+def snapshot(*nodes):
+    return list(iter_screen_elements(page(*nodes), 1080, 2400))
+
+
+def button(text, top, checked="false", resource_id=""):
+    return node("android.widget.Button", f"[0,{top}][1080,{top + 100}]", text=text, clickable="true",
+                checked=checked, resource_id=resource_id)
+
+
+def carry_over(old, new):
+    diff = diff_records(old, new)
+    next_index = carry_over_indexes(diff, max((record.index for record in old), default=-1) + 1)
+    return diff, next_index
+
+
+def test_identical_snapshots_keep_every_index():
+    old = snapshot(button("A", 0), button("B", 100))
+    new = snapshot(button("A", 0), button("B", 100))
+    diff, next_index = carry_over(old, new)
+    assert len(diff["unchanged"]) == 2 and not (diff["changed"] or diff["added"] or diff["removed"])
+    assert [record.index for record in new] == [0, 1]
+    assert next_index == 2
+
+
+def test_indexes_follow_elements_not_positions():
+    # A new element at the top shifts everything down in the list
+    old = snapshot(button("A", 100), button("B", 200))
+    new = snapshot(button("Banner", 0), button("A", 100), button("B", 200))
+    diff, next_index = carry_over(old, new)
+    assert {record.text: record.index for record in new} == {"Banner": 2, "A": 0, "B": 1}
+    assert [record.text for record in diff["added"]] == ["Banner"]
+    assert next_index == 3
+
+
+def test_removed_indexes_are_not_reused():
+    old = snapshot(button("A", 0), button("B", 100), button("C", 200))
+    new = snapshot(button("A", 0), button("C", 200), button("D", 300))
+    diff, _ = carry_over(old, new)
+    assert [record.index for record in diff["removed"]] == [1]
+    assert {record.text: record.index for record in new} == {"A": 0, "C": 2, "D": 3}
+
+
+def test_moved_and_toggled_elements_are_changed():
+    old = snapshot(button("A", 0), button("Wi-Fi", 100))
+    new = snapshot(button("Wi-Fi", 300, checked="true"), button("A", 0))
+    diff, _ = carry_over(old, new)
+    assert [(previous.text, record.index) for previous, record in diff["changed"]] == [("Wi-Fi", 1)]
+    change = describe_change(*diff["changed"][0])
+    assert change["index"] == 1
+    assert change["was"] == {"bounds": "[0,100][1080,200]", "checked": False}
+
+
+def test_text_change_pairs_with_nearby_element():
+    old = snapshot(button("3 items", 0, resource_id="com.shop:id/count"))
+    new = snapshot(button("4 items", 10, resource_id="com.shop:id/count"))
+    diff, _ = carry_over(old, new)
+    assert new[0].index == 0
+    assert describe_change(*diff["changed"][0])["was"]["text"] == "3 items"
+
+
+def test_text_change_far_away_is_add_and_remove():
+    old = snapshot(button("3 items", 0, resource_id="com.shop:id/count"))
+    new = snapshot(button("4 items", 1000, resource_id="com.shop:id/count"))
+    diff, _ = carry_over(old, new)
+    assert len(diff["added"]) == 1 and len(diff["removed"]) == 1
+    assert new[0].index == 1
+
+
+def test_duplicates_pair_closest_first():
+    old = snapshot(button("Delete", 0), button("Delete", 500))
+    new = snapshot(button("Delete", 510))
+    diff, _ = carry_over(old, new)
+    assert new[0].index == 1
+    assert [record.index for record in diff["removed"]] == [0]
+
+
+def test_indexes_stay_stable_over_several_snapshots():
+    first = snapshot(button("A", 0), button("B", 100))
+    second = snapshot(button("B", 100), button("C", 200))
+    _, next_index = carry_over(first, second)
+    third = snapshot(button("New", 0), button("C", 200))
+    diff, next_index = carry_over(second, third)
+    assert {record.text: record.index for record in third} == {"New": 3, "C": 2}
+    assert next_index == 4
@@ -0,0 +1,79 @@
+"""Compiled filter.json rules: hide/prune decisions and per-package profiles."""
+
+import json
+
+from environment.filters import HIDE, KEEP, PRUNE, ElementFilter, compile_filters
+
+
+def attrib(cls="android.widget.TextView", text="", resource_id="", package="com.example"):
+    return {"class": cls, "text": text, "resource-id": resource_id, "package": package}
+
+
+CONFIG = {
+    "filter": ["Sponsored", " Ad "],
+    "class_filter": ["android.widget.ProgressBar"],
+    "text_regex": [r"^\d+:\d\d$"],
+    "resource_id_filter": ["ad_badge", "com.other:id/promo"],
+    "resource_id_regex": [r":id/tracking_"],
+    "prune": {"class": ["android.webkit.WebView"], "resource_id": ["ad_container"], "text_regex": ["^Promoted"]},
+    "packages": {
+        "com.shop": {"filter": ["Recommended for you"], "prune": {"resource_id": ["carousel"]}},
+    },
+}
+
+
+def test_empty_config_compiles_to_none():
+    assert compile_filters(None) is None
+    assert compile_filters({}) is None
+
+
+def test_hide_rules():
+    rules = compile_filters(CONFIG)
+    assert rules.action(attrib(text="Sponsored")) == HIDE
+    assert rules.action(attrib(text="  Ad")) == HIDE  # Surrounding whitespace ignored on both sides
+    assert rules.action(attrib(cls="android.widget.ProgressBar")) == HIDE
+    assert rules.action(attrib(text="12:45")) == HIDE
+    assert rules.action(attrib(resource_id="com.example:id/ad_badge")) == HIDE  # Short id rule
+    assert rules.action(attrib(resource_id="com.other:id/promo")) == HIDE  # Full id rule
+    assert rules.action(attrib(resource_id="com.example:id/promo")) == KEEP
+    assert rules.action(attrib(resource_id="com.example:id/tracking_pixel")) == HIDE
+
+
+def test_prune_rules_win_over_hide():
+    rules = compile_filters(CONFIG)
+    assert rules.action(attrib(cls="android.webkit.WebView")) == PRUNE
+    assert rules.action(attrib(resource_id="com.example:id/ad_container")) == PRUNE
+    assert rules.action(attrib(text="Promoted: Sponsored")) == PRUNE
+
+
+def test_unmatched_nodes_are_kept():
+    rules = compile_filters(CONFIG)
+    assert rules.action(attrib(text="Inbox")) == KEEP
+    assert rules.action(attrib(text="Sponsored content")) == KEEP  # Text rules are exact
+    assert rules.action(attrib(text="12:45 pm")) == KEEP
+
+
+def test_package_profiles_add_to_top_level_rules():
+    rules = compile_filters(CONFIG)
+    shop = "com.shop"
+    assert rules.action(attrib(text="Recommended for you", package=shop)) == HIDE
+    assert rules.action(attrib(resource_id="com.shop:id/carousel", package=shop)) == PRUNE
+    assert rules.action(attrib(text="Sponsored", package=shop)) == HIDE  # Top-level rules still apply
+    # Profile rules stay with their package
+    assert rules.action(attrib(text="Recommended for you")) == KEEP
+    assert rules.action(attrib(resource_id="com.example:id/carousel")) == KEEP
+
+
+def test_compiled_once_per_distinct_config():
+    assert compile_filters(CONFIG) is compile_filters(json.loads(json.dumps(CONFIG)))
+    assert compile_filters(CONFIG).key != compile_filters({"filter": ["Sponsored"]}).key
+    rules = ElementFilter(CONFIG)
+    assert compile_filters(rules) is rules
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "filter.json"
+    path.write_text(json.dumps({"class_filter": ["android.widget.FrameLayout"]}))
+    rules = ElementFilter.from_file(str(path))
+    assert rules.action(attrib(cls="android.widget.FrameLayout")) == HIDE
+    assert rules.action(attrib()) == KEEP
@@ -0,0 +1,133 @@
+"""Hierarchy parsing: streaming/tree parser parity and page source fingerprints."""
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import node, page
+from environment import hierarchy
+from environment.filters import ElementFilter, compile_filters
+from environment.hierarchy import collect_tree_elements, fingerprint_page_source, iter_screen_elements, parse_bounds
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCREEN = page(
+    node("android.widget.FrameLayout", "[0,0][1080,2400]", "".join([
+        node("android.widget.LinearLayout", "[0,0][1080,200]", "".join([
+            node("android.widget.ImageButton", "[0,0][200,200]", content_desc="Back", clickable="true"),
+            node("android.widget.TextView", "[200,0][880,200]", text="Inbox"),
+            node("android.widget.ImageButton", "[880,0][1080,200]", content_desc="Search", clickable="true",
+                 resource_id="com.example:id/search"),
+        ])),
+        node("androidx.recyclerview.widget.RecyclerView", "[0,200][1080,2200]", "".join(
+            node("android.widget.LinearLayout", f"[0,{200 + 300 * i}][1080,{500 + 300 * i}]", "".join([
+                node("android.widget.TextView", f"[40,{220 + 300 * i}][1040,{300 + 300 * i}]", text=f"Message {i}"),
+                node("android.widget.CheckBox", f"[940,{320 + 300 * i}][1040,{420 + 300 * i}]", clickable="true",
+                     checked="true" if i % 2 else "false"),
+            ]), clickable="true", index=str(i))
+            for i in range(6)
+        ), resource_id="com.example:id/list"),
+        node("android.widget.EditText", "[0,2200][1080,2400]", text="Reply", focusable="true", focused="true"),
+        # Off screen: skipped by both parsers
+        node("android.widget.Button", "[0,2500][1080,2700]", text="Below the fold", clickable="true"),
+        # Disabled and empty: nothing to report
+        node("android.widget.Button", "[0,0][10,10]", enabled="false", clickable="true"),
+    ])),
+)
+
+
+def records_as_tuples(records):
+    """Everything the agent sees of a record list, including each record's parent chain."""
+    def chain(record):
+        parents = []
+        parent = record.parent
+        while parent is not None:
+            parents.append((parent.index, parent.class_name, parent.bounds, parent.child_index))
+            parent = parent.parent
+        return tuple(parents)
+
+    return [(record.to_dict(), record.focused, record.child_index, chain(record)) for record in records]
+
+
+def tree_records(page_source, filters=None, include_all=False, width=1080, height=2400):
+    records = []
+    collect_tree_elements(ET.fromstring(page_source), records, width, height, compile_filters(filters), include_all)
+    return records
+
+
+def stream_records(page_source, filters=None, include_all=False, width=1080, height=2400):
+    return list(iter_screen_elements(page_source, width, height, compile_filters(filters), include_all))
+
+
+@pytest.mark.parametrize("include_all", [False, True])
+def test_stream_matches_tree(include_all):
+    tree = tree_records(SCREEN, include_all=include_all)
+    assert records_as_tuples(stream_records(SCREEN, include_all=include_all)) == records_as_tuples(tree)
+    assert [record.index for record in tree] == list(range(len(tree)))
+
+
+def test_stream_matches_tree_with_filters():
+    filters = {
+        "filter": ["Inbox"],
+        "class_filter": ["android.widget.LinearLayout"],
+        "prune": {"resource_id": ["list"]},
+    }
+    stream = stream_records(SCREEN, filters)
+    assert records_as_tuples(stream) == records_as_tuples(tree_records(SCREEN, filters))
+    assert not any(record.text.startswith("Message") for record in stream)
+    assert "Inbox" not in [record.text for record in stream]
+
+
+def test_stream_matches_tree_across_chunks(monkeypatch):
+    # Chunk boundaries fall inside tags and attribute values
+    monkeypatch.setattr(hierarchy, "PARSE_CHUNK_SIZE", 7)
+    assert records_as_tuples(stream_records(SCREEN)) == records_as_tuples(tree_records(SCREEN))
+
+
+def test_stream_matches_tree_on_captured_page_source():
+    with open(os.path.join(REPO_ROOT, "test.xml"), encoding="utf-8") as f:
+        page_source = f.read()
+    for filters in (None, ElementFilter.from_file(os.path.join(REPO_ROOT, "filter.json"))):
+        stream = stream_records(page_source, filters, width=1344, height=2992)
+        assert stream
+        assert records_as_tuples(stream) == records_as_tuples(tree_records(page_source, filters, width=1344,
+                                                                          height=2992))
+
+
+def test_skips_off_screen_and_empty_nodes():
+    texts = [record.text or record.content_desc for record in stream_records(SCREEN)]
+    assert "Below the fold" not in texts
+    assert texts[:3] == ["Back", "Inbox", "Search"]
+
+
+def test_parent_links_skip_unreported_ancestors():
+    checkbox = next(record for record in stream_records(SCREEN) if record.class_name.endswith("CheckBox"))
+    row = checkbox.parent
+    assert row.index is not None and row.clickable  # The clickable row is reported itself
+    assert row.parent.index is None and row.parent.short_resource_id == "list"
+
+
+def test_parse_bounds():
+    assert parse_bounds("[0,200][1080,2200]") == (0, 200, 1080, 2200)
+    assert parse_bounds("") == (0, 0, 0, 0)
+
+
+def status_bar(clock: str) -> str:
+    return node("android.widget.FrameLayout", "[0,0][1080,60]",
+                node("android.widget.TextView", "[20,0][200,60]", text=clock, package="com.android.systemui"),
+                package="com.android.systemui")
+
+
+def test_fingerprint_ignores_status_bar_text():
+    app = node("android.widget.TextView", "[0,100][1080,200]", text="Inbox")
+    before = fingerprint_page_source(page(status_bar("9:41"), app))
+    assert fingerprint_page_source(page(status_bar("9:42"), app)) == before
+
+
+def test_fingerprint_sees_app_changes():
+    before = page(status_bar("9:41"), node("android.widget.TextView", "[0,100][1080,200]", text="Inbox"))
+    after = page(status_bar("9:41"), node("android.widget.TextView", "[0,100][1080,200]", text="Sent"))
+    moved = page(status_bar("9:41"), node("android.widget.TextView", "[0,120][1080,220]", text="Inbox"))
+    fingerprints = {fingerprint_page_source(source) for source in (before, after, moved)}
+    assert len(fingerprints) == 3
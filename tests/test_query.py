@@ -0,0 +1,95 @@
+"""Selector parsing, matching and error reporting."""
+
+import pytest
+
+from conftest import node, page
+from environment.hierarchy import iter_screen_elements
+from environment.query import SELECTOR_EXAMPLES, SelectorError, compile_selector
+
+SCREEN = page(
+    node("android.widget.LinearLayout", "[0,0][1080,200]", "".join([
+        node("android.widget.Button", "[0,0][540,200]", text="Sign in", clickable="true",
+             resource_id="com.example:id/btn_sign_in"),
+        node("android.widget.Button", "[540,0][1080,200]", text="Sign up now", clickable="true", index="1",
+             resource_id="com.example:id/btn_sign_up"),
+    ])),
+    node("androidx.recyclerview.widget.RecyclerView", "[0,200][1080,2000]", "".join(
+        node("android.widget.TextView", f"[0,{200 + 200 * i}][1080,{400 + 200 * i}]", text=f"{i + 1} items",
+             index=str(i))
+        for i in range(3)
+    ), resource_id="com.example:id/list"),
+    node("android.widget.EditText", "[0,2000][1080,2200]", text="", focusable="true", focused="true",
+         content_desc="Search messages"),
+)
+
+
+@pytest.fixture(scope="module")
+def records():
+    return list(iter_screen_elements(SCREEN, 1080, 2400))
+
+
+def select(records, selector):
+    return [record.text or record.content_desc for record in compile_selector(selector).select(records)]
+
+
+@pytest.mark.parametrize("selector", SELECTOR_EXAMPLES)
+def test_documented_examples_compile(selector):
+    compile_selector(selector)
+
+
+@pytest.mark.parametrize("selector, expected", [
+    ("Button", ["Sign in", "Sign up now"]),
+    ("android.widget.Button", ["Sign in", "Sign up now"]),
+    ('[text="Sign in"]', ["Sign in"]),
+    ("[text~=SIGN]", ["Sign in", "Sign up now"]),
+    ("[text~=sign up]", ["Sign up now"]),
+    ("[text~= sign up ]", ["Sign up now"]),
+    ("[id^=btn_sign]", ["Sign in", "Sign up now"]),
+    ("[id=com.example:id/btn_sign_in]", ["Sign in"]),
+    ("[text$=now]", ["Sign up now"]),
+    (r"[text=/^\d+ items$/]", ["1 items", "2 items", "3 items"]),
+    ("[desc=/^search/i]", ["Search messages"]),
+    (":editable:focused", ["Search messages"]),
+    ("Button:clickable:nth-child(2)", ["Sign up now"]),
+    (":in(0,0,1080,300) :clickable", ["Sign in", "Sign up now"]),
+    ("RecyclerView[id=list] TextView", ["1 items", "2 items", "3 items"]),
+    ("RecyclerView TextView:nth-child(1)", ["1 items"]),
+    ("LinearLayout TextView", []),
+])
+def test_selector_matches(records, selector, expected):
+    assert select(records, selector) == expected
+
+
+def test_in_region_uses_element_center(records):
+    assert select(records, ":in(0,0,540,200)") == ["Sign in"]
+
+
+def test_select_limit(records):
+    assert len(compile_selector("TextView").select(records, limit=2)) == 2
+
+
+def test_compile_is_cached():
+    assert compile_selector("[text~=sign]") is compile_selector("[text~=sign]")
+
+
+@pytest.mark.parametrize("selector, message", [
+    ("", "Empty selector"),
+    ("   ", "Empty selector"),
+    ("[colour=red]", "Unknown attribute"),
+    ("[text~=/sign/]", "only work with '='"),
+    ("[text=/(/]", "Invalid regular expression"),
+    ("[text=sign", "Malformed attribute"),
+    ("[text]", "Malformed attribute"),
+    (":hovered", "Unknown pseudo-class"),
+    (":nth-child(first)", "expects 1 integer"),
+    (":in(0,0,10)", "expects 4 integer"),
+    ("Button > TextView", "Unexpected character"),
+    ("Button,TextView", "Unexpected character"),
+])
+def test_selector_errors(selector, message):
+    with pytest.raises(SelectorError, match=message):
+        compile_selector(selector)
+
+
+def test_selector_error_is_value_error():
+    assert issubclass(SelectorError, ValueError)
@@ -0,0 +1,54 @@
+"""Raw framebuffer parsing and single-pass screenshot encoding."""
+
+import struct
+from io import BytesIO
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from environment.adb import parse_framebuffer
+from environment.imaging import encode_image
+
+
+def screencap(width, height, pixel_format, pixels, color_space=None):
+    header = struct.pack("<III", width, height, pixel_format)
+    if color_space is not None:
+        header += struct.pack("<I", color_space)
+    return header + pixels
+
+
+@pytest.mark.parametrize("color_space", [None, 1])
+def test_parse_framebuffer_rgba(color_space):
+    pixels = bytes([255, 0, 0, 255, 0, 255, 0, 255, 0, 0, 255, 255, 10, 20, 30, 255])
+    width, height, mode, raw_mode, data = parse_framebuffer(screencap(2, 2, 1, pixels, color_space))
+    assert (width, height, mode, raw_mode) == (2, 2, "RGBA", "RGBA")
+    img = Image.frombuffer(mode, (width, height), data, "raw", raw_mode, 0, 1)
+    assert img.getpixel((0, 0)) == (255, 0, 0, 255)
+    assert img.getpixel((1, 1)) == (10, 20, 30, 255)
+
+
+def test_parse_framebuffer_bgra():
+    width, height, mode, raw_mode, data = parse_framebuffer(screencap(1, 1, 5, bytes([30, 20, 10, 255])))
+    assert Image.frombuffer(mode, (width, height), data, "raw", raw_mode, 0, 1).getpixel((0, 0)) == (10, 20, 30, 255)
+
+
+def test_parse_framebuffer_rejects_bad_data():
+    with pytest.raises(RuntimeError):
+        parse_framebuffer(b"")
+    with pytest.raises(RuntimeError):
+        parse_framebuffer(screencap(1, 1, 99, bytes(4)))
+    with pytest.raises(RuntimeError):
+        parse_framebuffer(screencap(2, 2, 1, bytes(4)))  # Truncated pixels
+
+
+@pytest.mark.parametrize("image_format, pil_format", [("png", "PNG"), ("jpeg", "JPEG"), ("webp", "WEBP")])
+def test_encode_image_formats(image_format, pil_format):
+    img = Image.new("RGBA", (8, 8), (200, 10, 10, 255))
+    encoded = encode_image(img, image_format, quality=80)
+    assert Image.open(BytesIO(encoded)).format == pil_format
+
+
+def test_encode_image_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        encode_image(Image.new("RGB", (1, 1)), "bmp")
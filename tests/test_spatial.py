@@ -0,0 +1,100 @@
+"""Spatial index: hit testing and near-miss snapping for coordinate taps."""
+
+import random
+
+from environment.elements import ElementRecord, ElementTable
+from environment.spatial import SpatialIndex
+
+
+def record(index, left, top, right, bottom, clickable=True, text=""):
+    return ElementRecord(index, text, "android.widget.Button", "", "", clickable, left, top, right, bottom)
+
+
+def snap(index, x, y, radius=48):
+    """What Android.element_at picks: the topmost clickable hit, else the nearest within radius."""
+    return index.topmost(x, y) or index.nearest(x, y, radius)
+
+
+def test_topmost_prefers_later_nodes():
+    card = record(0, 0, 0, 1080, 400)
+    button = record(1, 100, 100, 300, 200)
+    index = SpatialIndex([card, button])
+    assert index.topmost(150, 150) is button
+    assert index.at(150, 150) == [button, card]
+    assert index.topmost(500, 300) is card
+
+
+def test_right_and_bottom_edges_are_exclusive():
+    button = record(0, 100, 100, 200, 200)
+    index = SpatialIndex([button])
+    assert index.topmost(199, 199) is button
+    assert index.topmost(200, 150) is None
+    assert index.topmost(150, 200) is None
+
+
+def test_non_clickable_records_are_skipped_unless_asked():
+    label = record(0, 0, 0, 500, 100, clickable=False)
+    index = SpatialIndex([label])
+    assert index.topmost(50, 50) is None
+    assert index.topmost(50, 50, clickable=False) is label
+
+
+def test_near_miss_snaps_to_closest_within_radius():
+    left = record(0, 100, 100, 200, 200)
+    right = record(1, 300, 100, 400, 200)
+    index = SpatialIndex([left, right], cell_size=64)
+    assert snap(index, 230, 150) is left  # 31 px from left, 70 px from right
+    assert snap(index, 270, 150) is right
+    assert snap(index, 250, 150, radius=40) is None  # 51 px from both
+    assert snap(index, 150, 260, radius=64) is left  # Below, across bucket edges
+
+
+def test_nearest_breaks_ties_towards_the_top():
+    below = record(0, 0, 0, 100, 100)
+    above = record(1, 0, 0, 100, 100)
+    assert SpatialIndex([below, above]).nearest(120, 50, 48) is above
+
+
+def test_degenerate_bounds_are_ignored():
+    index = SpatialIndex([record(0, 100, 100, 100, 200), record(1, 50, 50, 60, 50)])
+    assert index.at(100, 150, clickable=False) == []
+    assert index.nearest(100, 150, 48) is None
+
+
+def test_intersecting_in_document_order():
+    records = [record(i, 0, i * 100, 1080, i * 100 + 100) for i in range(5)]
+    index = SpatialIndex(records)
+    assert index.intersecting(0, 150, 1080, 350) == records[1:4]
+    assert index.intersecting(0, 150, 0, 350) == []
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    records = []
+    for i in range(200):
+        left, top = rng.randrange(0, 1000), rng.randrange(0, 2300)
+        records.append(record(i, left, top, left + rng.randrange(1, 300), top + rng.randrange(1, 200),
+                              clickable=rng.random() < 0.7))
+    index = SpatialIndex(records)
+    for _ in range(300):
+        x, y = rng.randrange(0, 1080), rng.randrange(0, 2400)
+        expected = [r for r in reversed(records) if r.clickable and r.contains(x, y)]
+        assert index.at(x, y, clickable=True) == expected
+
+        def distance(r):
+            dx = max(r.left - x, 0, x - (r.right - 1))
+            dy = max(r.top - y, 0, y - (r.bottom - 1))
+            return (dx * dx + dy * dy) ** 0.5
+
+        in_reach = [r for r in records if r.clickable and distance(r) <= 48]
+        nearest = index.nearest(x, y, 48)
+        if in_reach:
+            assert distance(nearest) == min(distance(r) for r in in_reach)
+        else:
+            assert nearest is None
+
+
+def test_element_table_builds_index_once():
+    table = ElementTable([record(0, 0, 0, 100, 100)])
+    assert table.spatial is table.spatial
+    assert table.spatial.topmost(10, 10).index == 0
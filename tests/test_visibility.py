@@ -0,0 +1,83 @@
+"""Visibility pass: clipping by scrolling ancestors and occlusion by overlays."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from conftest import node, page
+from environment.hierarchy import iter_screen_elements
+from environment.visibility import apply_visibility, compute_visibility
+
+WIDTH, HEIGHT = 1080, 2400
+# Occlusion is measured on 8 px raster cells: one cell row of a 200 px tall row
+RASTER_TOLERANCE = 8 / 200
+
+
+def parse(*nodes):
+    return list(iter_screen_elements(page(*nodes), WIDTH, HEIGHT))
+
+
+def visibility_by_text(records):
+    return {record.text: round(visible, 2) for record, visible in
+            zip(records, compute_visibility(records, WIDTH, HEIGHT))}
+
+
+def list_rows(count, top=0, height=200):
+    return "".join(
+        node("android.widget.Button", f"[0,{top + height * i}][1080,{top + height * (i + 1)}]", text=f"Row {i}",
+             clickable="true")
+        for i in range(count)
+    )
+
+
+def test_fully_visible():
+    assert visibility_by_text(parse(list_rows(3))) == {"Row 0": 1.0, "Row 1": 1.0, "Row 2": 1.0}
+
+
+def test_clipped_by_scrolling_ancestor():
+    # The list shows [0, 500); row 2 is half inside it, row 3 is entirely outside
+    records = parse(node("androidx.recyclerview.widget.RecyclerView", "[0,0][1080,500]", list_rows(4),
+                         scrollable="true"))
+    assert visibility_by_text(records) == {"Row 0": 1.0, "Row 1": 1.0, "Row 2": 0.5, "Row 3": 0.0}
+
+
+def test_covered_by_later_clickable_overlay():
+    dialog = node("android.widget.Button", "[0,0][1080,300]", text="Dialog", clickable="true")
+    visibility = visibility_by_text(parse(list_rows(3), dialog))
+    assert visibility["Row 0"] == 0.0
+    assert visibility["Row 1"] == pytest.approx(0.5, abs=RASTER_TOLERANCE)
+    assert visibility["Row 2"] == 1.0
+    assert visibility["Dialog"] == 1.0
+
+
+def test_earlier_and_non_clickable_nodes_do_not_occlude():
+    banner = node("android.widget.TextView", "[0,0][1080,300]", text="Banner")
+    backdrop = node("android.widget.Button", "[0,0][1080,600]", text="Backdrop", clickable="true")
+    visibility = visibility_by_text(parse(backdrop, list_rows(2), banner))
+    assert visibility["Row 0"] == 1.0 and visibility["Row 1"] == 1.0
+
+
+def test_descendants_do_not_occlude_their_ancestor():
+    card = node("android.widget.FrameLayout", "[0,0][1080,400]",
+                node("android.widget.Button", "[40,40][1040,360]", text="Buy", clickable="true"),
+                text="Card", clickable="true")
+    visibility = visibility_by_text(parse(card))
+    assert visibility == {"Card": 1.0, "Buy": 1.0}
+
+
+def test_apply_visibility_drops_and_renumbers():
+    dialog = node("android.widget.Button", "[0,0][1080,300]", text="Dialog", clickable="true")
+    kept = apply_visibility(parse(list_rows(3), dialog), WIDTH, HEIGHT, threshold=0.1)
+    assert [(record.index, record.text) for record in kept] == [(0, "Row 1"), (1, "Row 2"), (2, "Dialog")]
+    assert kept[0].to_dict()["visibility"] == pytest.approx(0.5, abs=RASTER_TOLERANCE)
+
+
+def test_apply_visibility_flags_without_dropping():
+    dialog = node("android.widget.Button", "[0,0][1080,300]", text="Dialog", clickable="true")
+    records = apply_visibility(parse(list_rows(3), dialog), WIDTH, HEIGHT, threshold=0.1, drop=False)
+    assert [record.index for record in records] == [0, 1, 2, 3]
+    assert records[0].visibility == 0.0
+
+
+def test_empty_snapshot():
+    assert compute_visibility([], WIDTH, HEIGHT) == []